@@ -0,0 +1,163 @@
+"""
+Async variants of the read endpoints in `api.views`, for the ASGI app.
+
+They answer with the same JSON as their DRF counterparts (DRF 3.14 has no
+async views, so these are plain Django views) and share their cache entries
+and ETags. Under WSGI Django still runs them, one event loop per request.
+"""
+
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.utils.cache import get_conditional_response
+from rest_framework import status
+
+from api.views import (
+    MAX_PAGE_SIZE,
+    _data_etag,
+    _get_count,
+)
+from words import caching as wcache
+from words import database_functions as wdbf
+from words import serializers as wser
+
+
+def _error(message, status_code, **extra):
+    return JsonResponse({"error": message, **extra}, status=status_code)
+
+
+def aget_view(view):
+    """
+    Async counterpart of `@api_view(["GET"])` plus
+    `conditional_on_data_version`: only GET is allowed, and conditional
+    requests are answered with a 304 before the view runs.
+    Django 4.2's `condition` and `require_GET` decorators cannot wrap
+    coroutines.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return HttpResponseNotAllowed(["GET"])
+
+        etag = await wcache.run_cache(_data_etag, request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await view(request, *args, **kwargs)
+        response.headers.setdefault("ETag", etag)
+        return response
+
+    return wrapper
+
+
+async def _serialize(words, many=False):
+    synonyms = await wdbf.asynonyms_of(words if many else [words])
+    return wser.WordSerializer(words, many=many, context={"synonyms": synonyms}).data
+
+
+@aget_view
+async def get_word(request):
+    """Async `api.views.get_word`."""
+    word = request.GET.get("word")
+    language = request.GET.get("language")
+    if not word:
+        return _error("Missing required parameter: 'word'.", status.HTTP_400_BAD_REQUEST)
+
+    async def compute():
+        return await _serialize(await wdbf.aget_word(word, language))
+
+    try:
+        data = await wcache.aget_or_compute("word", language, {"word": word}, compute)
+        return JsonResponse({"message": f"Word '{word}' found.", "data": data})
+    except LookupError as e:
+        return _error(str(e), status.HTTP_400_BAD_REQUEST)
+    except wdbf.WordNotFound as e:
+        return _error(str(e), status.HTTP_404_NOT_FOUND, suggestions=e.suggestions)
+    except ValueError as e:
+        return _error(str(e), status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return _error(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def get_random_word(request):
+    """Async `api.views.get_random_word`."""
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    language = request.GET.get("language")
+    if not language:
+        return _error(
+            "Missing required parameter: 'language'.", status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        word_obj = await wdbf.aget_weighted_word(language)
+        return JsonResponse(
+            {"message": f"Word {word_obj.word} found.", "data": await _serialize(word_obj)}
+        )
+    except ValueError as e:
+        return _error(str(e), status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return _error(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@aget_view
+async def get_words_list(request):
+    """Async `api.views.get_words_list`, in both page and cursor mode."""
+    language = request.GET.get("language")
+    per_page = request.GET.get("per_page", 10)
+
+    if "cursor" in request.GET:
+        return await _get_words_cursor(request, language, per_page)
+
+    page = request.GET.get("page", 1)
+
+    async def compute():
+        words, pages, current, total = await wdbf.aget_words_list(
+            language, page, per_page
+        )
+        return {
+            "message": "Found page of words.",
+            "data": await _serialize(words, many=True),
+            "page": current,
+            "pages": pages,
+            "total": total,
+        }
+
+    try:
+        data = await wcache.aget_or_compute(
+            "list", language, {"page": page, "per_page": per_page}, compute
+        )
+        return JsonResponse(data)
+    except Exception as e:
+        return _error(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def _get_words_cursor(request, language, per_page):
+    cursor = request.GET.get("cursor")
+    with_total = request.GET.get("total", "").lower() in ("true", "1", "yes")
+
+    async def compute():
+        words, next = await wdbf.aget_words_cursor(language, cursor, per_page)
+        data = {
+            "message": "Found page of words.",
+            "data": await _serialize(words, many=True),
+            "next": next,
+        }
+        if with_total:
+            data["total"] = await sync_to_async(wdbf.count_words)(language)
+        return data
+
+    try:
+        per_page = _get_count(per_page, MAX_PAGE_SIZE, name="per_page")
+        data = await wcache.aget_or_compute(
+            "cursor",
+            language,
+            {"cursor": cursor, "per_page": per_page, "total": with_total},
+            compute,
+        )
+        return JsonResponse(data)
+    except ValueError as e:
+        return _error(str(e), status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return _error(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR)
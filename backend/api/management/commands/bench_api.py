@@ -0,0 +1,174 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+import words.models as models
+
+ENDPOINTS = ["word", "random-word", "list-words"]
+HOST = "localhost"
+DUMMY_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+def p99(latencies):
+    latencies = sorted(latencies)
+    return latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of a read endpoint served by the WSGI handler "
+        "(a thread per concurrent request) with the sync and async views "
+        "served by the ASGI application, at several concurrency levels"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint",
+            choices=ENDPOINTS,
+            default="list-words",
+            help="Endpoint to request (default: list-words)",
+        )
+        parser.add_argument(
+            "--language",
+            type=str,
+            default="en",
+            help="Language passed to the endpoint (default: en)",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=1000,
+            help="Number of requests per run (default: 1000)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[1, 16, 128],
+            help="Concurrency levels to run at (default: 1 16 128)",
+        )
+        parser.add_argument(
+            "--cached",
+            action="store_true",
+            help="Keep the read-through cache, by default every request hits the database",
+        )
+
+    def query_string(self, endpoint, language):
+        if endpoint == "word":
+            word = models.Word.objects.filter(language=language).first()
+            if word is None:
+                raise CommandError(f"No words found in language '{language}'.")
+            return urlencode({"word": word.word, "language": language})
+        if endpoint == "random-word":
+            return urlencode({"language": language})
+        return urlencode({"language": language, "page": 1, "per_page": 10})
+
+    def run_wsgi(self, path, query_string, n, concurrency):
+        handler = WSGIHandler()
+
+        def request():
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": path,
+                "QUERY_STRING": query_string,
+                "SERVER_NAME": HOST,
+                "SERVER_PORT": "80",
+                "HTTP_HOST": HOST,
+                "wsgi.input": io.BytesIO(),
+                "wsgi.url_scheme": "http",
+            }
+            statuses = []
+            start = time.perf_counter()
+            response = handler(environ, lambda status, headers: statuses.append(status))
+            b"".join(response)
+            response.close()
+            if not statuses[0].startswith("200"):
+                raise CommandError(f"{path} answered {statuses[0]}")
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            start = time.perf_counter()
+            latencies = list(executor.map(lambda _: request(), range(n)))
+            return latencies, time.perf_counter() - start
+
+    async def run_asgi(self, path, query_string, n, concurrency):
+        from thyme_server.asgi import application
+
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query_string.encode(),
+            "root_path": "",
+            "scheme": "http",
+            "server": (HOST, 80),
+            "client": ("127.0.0.1", 50000),
+            "headers": [(b"host", HOST.encode())],
+        }
+
+        async def request():
+            messages = [{"type": "http.request", "body": b"", "more_body": False}]
+            status = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # Nothing more to send, wait like a client keeping the connection open
+                await asyncio.Event().wait()
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    status.append(message["status"])
+
+            start = time.perf_counter()
+            await application(dict(scope), receive, send)
+            if status[0] != 200:
+                raise CommandError(f"{path} answered {status[0]}")
+            return time.perf_counter() - start
+
+        remaining = iter(range(n))
+        latencies = []
+
+        async def client():
+            for _ in remaining:
+                latencies.append(await request())
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return latencies, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        endpoint, n = options["endpoint"], options["requests"]
+        query_string = self.query_string(endpoint, options["language"])
+        runs = [
+            ("wsgi", f"/api/{endpoint}/"),
+            ("asgi", f"/api/{endpoint}/"),
+            ("asgi-async", f"/api/async/{endpoint}/"),
+        ]
+
+        settings = {} if options["cached"] else {"CACHES": DUMMY_CACHE}
+        with override_settings(**settings):
+            for concurrency in options["concurrency"]:
+                for name, path in runs:
+                    if name == "wsgi":
+                        self.run_wsgi(path, query_string, concurrency, concurrency)
+                        latencies, elapsed = self.run_wsgi(
+                            path, query_string, n, concurrency
+                        )
+                    else:
+                        asyncio.run(self.run_asgi(path, query_string, 1, 1))
+                        latencies, elapsed = asyncio.run(
+                            self.run_asgi(path, query_string, n, concurrency)
+                        )
+                    self.stdout.write(
+                        f"c={concurrency:<4} {name:<11} {n / elapsed:8.1f} req/s  "
+                        f"p99 {p99(latencies) * 1000:8.2f} ms"
+                    )
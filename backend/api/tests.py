@@ -1,3 +1,595 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+import words.models as models
+from terminal import history
+from words.database_functions import create_synonym
+from words import caching as wcache
+from words import versions
+from words.caching import cache_stats
+from words.fuzzy import fuzzy_index
+from words.sampler import word_sampler
+
+
+class RandomWordsTestCase(TestCase):
+    def setUp(self):
+        word_sampler.invalidate()
+        spanish = models.Word.objects.create(word="uno", language="es")
+        for i in range(20):
+            word = models.Word.objects.create(word=f"word{i}", language="en", p=i)
+            create_synonym(word, spanish)
+
+    def test_returns_distinct_words(self):
+        response = self.client.get(
+            reverse("random_words"), {"language": "en", "n": 5}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()["data"]
+        self.assertEqual(len(data), 5)
+        self.assertEqual(len({w["word"] for w in data}), 5)
+        self.assertTrue(all(w["synonyms"] == ["uno"] for w in data))
+
+    def test_query_count_does_not_depend_on_n(self):
+        word_sampler.get_table("en")
+        for n in (1, 20):
+            with self.assertNumQueries(2):
+                self.client.get(reverse("random_words"), {"language": "en", "n": n})
+
+    def test_invalid_n(self):
+        response = self.client.get(
+            reverse("random_words"), {"language": "en", "n": "many"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        word = models.Word.objects.create(word="dog", language="en")
+        create_synonym(word, models.Word.objects.create(word="perro", language="es"))
+
+    def test_streams_csv(self):
+        response = self.client.get(
+            reverse("export_words"), {"language": "en", "translation": "es"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        body = b"".join(response.streaming_content).decode()
+        self.assertIn("dog;perro;", body)
+
+    def test_invalid_format(self):
+        response = self.client.get(
+            reverse("export_words"), {"language": "en", "format": "xml"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_csv_needs_translation(self):
+        response = self.client.get(reverse("export_words"), {"language": "en"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("translation", response.json()["error"])
+        response = self.client.get(
+            reverse("export_words"), {"language": "en", "format": "jsonl"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalid_language(self):
+        for params in (
+            {"language": "zz", "format": "jsonl"},
+            {"language": "en", "translation": "zz"},
+        ):
+            response = self.client.get(reverse("export_words"), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertFalse(response.streaming)
+
+
+class ReviewResultsTestCase(TestCase):
+    def setUp(self):
+        self.word = models.Word.objects.create(word="dog", language="en", strength=3)
+
+    def test_correct_must_be_a_boolean(self):
+        for correct in ("false", "0", 0, None):
+            response = self.client.post(
+                reverse("review_results"),
+                {"results": [{"word": "dog", "language": "en", "correct": correct}]},
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.word.refresh_from_db()
+        self.assertEqual(self.word.strength, 3)
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Pins the number of queries every endpoint may run, so that an N+1
+    sneaking back in fails the build. Budgets count the SAVEPOINT/RELEASE
+    pairs that `transaction.atomic` issues inside a test case.
+    """
+
+    def setUp(self):
+        cache.clear()
+        word_sampler.invalidate()
+        for i in range(30):
+            word = models.Word.objects.create(word=f"word{i}", language="en", p=1)
+            create_synonym(
+                word, models.Word.objects.create(word=f"palabra{i}", language="es")
+            )
+        history.history_writer.discard()
+        history.record("help")
+        history.flush()
+        word_sampler.get_table("en")
+        fuzzy_index.invalidate()
+        fuzzy_index.suggest("word")
+
+    def assertBudget(self, budget, method, name, data=None):
+        with self.assertNumQueries(budget):
+            if method == "get":
+                response = self.client.get(reverse(name), data or {})
+            else:
+                response = getattr(self.client, method)(
+                    reverse(name), data or {}, content_type="application/json"
+                )
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertLess(response.status_code, 500)
+        return response
+
+    def test_status(self):
+        self.assertBudget(0, "get", "get_status")
+
+    def test_languages(self):
+        self.assertBudget(0, "get", "languages")
+
+    def test_complete(self):
+        self.assertBudget(1, "get", "complete", {"q": "word1", "language": "en"})
+
+    def test_last_command(self):
+        self.assertBudget(1, "get", "get_last_command", {"i": 0})
+
+    def test_command_history(self):
+        self.assertBudget(0, "post", "post_command_history", {"command": "help"})
+
+    def test_word(self):
+        self.assertBudget(2, "get", "word", {"word": "word1", "language": "en"})
+        self.assertBudget(2, "get", "word", {"word": "word1"})
+        self.assertBudget(1, "get", "word", {"word": "missing"})
+
+    def test_post_word(self):
+        self.assertBudget(6, "post", "post_word", {"word": "new", "language": "en"})
+
+    def test_random_word(self):
+        self.assertBudget(2, "get", "random_word", {"language": "en"})
+
+    def test_random_words(self):
+        self.assertBudget(2, "get", "random_words", {"language": "en", "n": 30})
+
+    def test_due_words(self):
+        self.assertBudget(2, "get", "due_words", {"language": "en", "n": 30})
+
+    def test_review_results(self):
+        results = [{"word": f"word{i}", "language": "en", "correct": True} for i in range(30)]
+        self.assertBudget(9, "post", "review_results", {"results": results})
+
+    def test_list_words(self):
+        self.assertBudget(3, "get", "list_words", {"language": "en", "per_page": 30})
+        self.assertBudget(3, "get", "list_words", {"per_page": 100, "page": 1})
+
+    def test_list_words_cursor(self):
+        response = self.assertBudget(
+            3, "get", "list_words", {"cursor": "", "per_page": 10, "total": "true"}
+        )
+        self.assertEqual(response.json()["total"], 60)
+        # Deep pages cost the same and the total comes from the cached count
+        response = self.assertBudget(
+            2,
+            "get",
+            "list_words",
+            {"cursor": response.json()["next"], "per_page": 10, "total": "true"},
+        )
+        self.assertEqual(response.json()["data"][0]["language"], "en")
+
+    def test_export(self):
+        self.assertBudget(1, "get", "export_words", {"language": "en", "translation": "es"})
+
+    def test_translation_pairs(self):
+        response = self.assertBudget(
+            1, "get", "translation_pairs", {"from": "en", "to": "es", "limit": 10}
+        )
+        self.assertBudget(
+            1,
+            "get",
+            "translation_pairs",
+            {"from": "en", "to": "es", "after": response.json()["next"]},
+        )
+
+    def test_delete_word(self):
+        self.assertBudget(4, "delete", "delete_word", {"word": "word1", "language": "en"})
+
+    def test_update_word_synonyms(self):
+        self.assertBudget(
+            8,
+            "post",
+            "update_word_synonyms",
+            {
+                "word": "word1",
+                "language": "en",
+                "synonym_list": ["a", "b", "c"],
+                "synonym_language": "es",
+            },
+        )
+
+
+class ListWordsCursorTestCase(TestCase):
+    def setUp(self):
+        for word, language in [("b", "en"), ("a", "en"), ("c", "es"), ("a", "es")]:
+            models.Word.objects.create(word=word, language=language)
+
+    def test_walk_all_pages(self):
+        seen, cursor = [], ""
+        while cursor is not None:
+            response = self.client.get(
+                reverse("list_words"), {"cursor": cursor, "per_page": 3}
+            )
+            body = response.json()
+            seen += [(w["language"], w["word"]) for w in body["data"]]
+            cursor = body["next"]
+        self.assertEqual(seen, [("en", "a"), ("en", "b"), ("es", "a"), ("es", "c")])
+
+    def test_total_follows_writes(self):
+        params = {"cursor": "", "language": "en", "total": "1"}
+        self.assertEqual(self.client.get(reverse("list_words"), params).json()["total"], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            models.Word.objects.create(word="c", language="en")
+        self.assertEqual(self.client.get(reverse("list_words"), params).json()["total"], 3)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("list_words"), {"cursor": "nope"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        self.word = models.Word.objects.create(word="dog", language="en")
+        models.Word.objects.create(word="perro", language="es")
+
+    def get(self, name, params, **headers):
+        return self.client.get(reverse(name), params, **headers)
+
+    def test_not_modified_without_queries(self):
+        params = {"word": "dog", "language": "en"}
+        response = self.get("word", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.get("word", params, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_change_etag_of_their_language_only(self):
+        en = self.get("list_words", {"language": "en"})["ETag"]
+        es = self.get("list_words", {"language": "es"})["ETag"]
+        everything = self.get("list_words", {})["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.word.strength = 3
+            self.word.save()
+
+        self.assertNotEqual(self.get("list_words", {"language": "en"})["ETag"], en)
+        self.assertEqual(self.get("list_words", {"language": "es"})["ETag"], es)
+        self.assertNotEqual(self.get("list_words", {})["ETag"], everything)
+
+    def test_etag_changes_on_commit(self):
+        etag = self.get("list_words", {"language": "en"})["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.word.strength = 3
+            self.word.save()
+            # Readers keep the old version until the write is visible
+            self.assertEqual(self.get("list_words", {"language": "en"})["ETag"], etag)
+        self.assertNotEqual(self.get("list_words", {"language": "en"})["ETag"], etag)
+
+    def test_synonym_changes_touch_both_languages(self):
+        es = self.get("list_words", {"language": "es"})["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            create_synonym(self.word, models.Word.objects.get(word="perro"))
+        self.assertNotEqual(self.get("list_words", {"language": "es"})["ETag"], es)
+
+    def test_languages(self):
+        response = self.get("languages", {})
+        self.assertEqual(response.json()["data"][0], {"value": "en", "label": "English"})
+        response = self.get("languages", {}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class ReadThroughCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.word = models.Word.objects.create(word="dog", language="en")
+        self.params = {"word": "dog", "language": "en"}
+
+    def get_word(self):
+        return self.client.get(reverse("word"), self.params).json()["data"]
+
+    def test_second_lookup_is_served_from_cache(self):
+        hits = cache_stats.hits
+        self.get_word()
+        with self.assertNumQueries(0):
+            self.get_word()
+        self.assertEqual(cache_stats.hits, hits + 1)
+
+        stats = self.client.get(reverse("cache_stats")).json()
+        self.assertGreaterEqual(stats["hits"], 1)
+
+    def test_save_invalidates(self):
+        self.get_word()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.word.strength = 4
+            self.word.save()
+        self.assertEqual(self.get_word()["strength"], 4)
+
+    def test_synonyms_invalidate(self):
+        self.get_word()
+        with self.captureOnCommitCallbacks(execute=True):
+            create_synonym(self.word, models.Word.objects.create(word="perro", language="es"))
+        self.assertEqual(self.get_word()["synonyms"], ["perro"])
+
+    def test_renamed_synonym_invalidates_other_language(self):
+        perro = models.Word.objects.create(word="perro", language="es")
+        create_synonym(self.word, perro)
+        self.get_word()
+        perro = models.Word.objects.get(pk=perro.pk)
+        perro.word = "can"
+        with self.captureOnCommitCallbacks(execute=True):
+            perro.save()
+        self.assertEqual(self.get_word()["synonyms"], ["can"])
+
+    def test_result_computed_across_a_write_is_not_stored(self):
+        def compute():
+            # A writer commits while the result is being computed
+            with self.captureOnCommitCallbacks(execute=True):
+                versions.bump("en")
+            return "stale"
+
+        self.assertEqual(wcache.get_or_compute("word", "en", self.params, compute), "stale")
+        self.assertEqual(
+            wcache.get_or_compute("word", "en", self.params, lambda: "fresh"), "fresh"
+        )
+
+    def test_list_words_is_cached(self):
+        self.client.get(reverse("list_words"), {"language": "en"})
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("list_words"), {"language": "en"})
+        self.assertEqual(response.json()["total"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            models.Word.objects.create(word="cat", language="en")
+        response = self.client.get(reverse("list_words"), {"language": "en"})
+        self.assertEqual(response.json()["total"], 2)
+
+
+class CompleteTestCase(TestCase):
+    def setUp(self):
+        for word in ["status", "stone", "help"]:
+            models.Word.objects.create(word=word, language="en")
+
+    def complete(self, q, **params):
+        return self.client.get(reverse("complete"), {"q": q, **params}).json()
+
+    def test_command_and_words(self):
+        response = self.complete("st", language="en")
+        self.assertEqual(response["words"], ["status", "stone"])
+        self.assertEqual(response["commands"], ["status"])
+
+    def test_argument(self):
+        response = self.complete("help he", language="en")
+        self.assertEqual(response["words"], ["help"])
+        self.assertEqual(response["commands"], [])
+
+    def test_option(self):
+        response = self.complete("status --")
+        self.assertEqual(response["words"], [])
+
+    def test_invalid(self):
+        response = self.client.get(reverse("complete"), {"q": "s", "k": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse("complete"), {"q": "s", "language": "xx"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class WordSuggestionsTestCase(TestCase):
+    def setUp(self):
+        fuzzy_index.invalidate()
+        models.Word.objects.create(word="house", language="en")
+
+    def test_not_found_suggests(self):
+        response = self.client.get(reverse("word"), {"word": "hose", "language": "en"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json()["suggestions"], ["house"])
+
+
+class TerminalInputTestCase(TestCase):
+    def tearDown(self):
+        history.history_writer.discard()
+
+    def post(self, line):
+        return self.client.post(
+            reverse("terminal"), {"input": line}, content_type="application/json"
+        ).json()
+
+    def test_runs_input(self):
+        response = self.post("status")
+        self.assertTrue(response["handled"])
+        self.assertTrue(response["output"].startswith("Terminal access is available\n"))
+
+    def test_words_terminal(self):
+        self.assertTrue(self.post("words")["output"].endswith("words> "))
+        try:
+            self.assertIn("No words found", self.post("list en")["output"])
+        finally:
+            self.assertTrue(self.post("exit")["output"].endswith("user@terminal:~$ "))
+
+    def test_sessions_are_separate(self):
+        self.post("words")
+        try:
+            other = self.client_class()
+            response = other.post(
+                reverse("terminal"), {"input": "list"}, content_type="application/json"
+            ).json()
+            self.assertIn("Command not found", response["output"])
+        finally:
+            self.post("exit")
+
+    def test_missing_input(self):
+        response = self.client.post(reverse("terminal"), {}, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        fuzzy_index.invalidate()
+        word_sampler.invalidate()
+        dog = models.Word.objects.create(word="dog", language="en")
+        models.Word.objects.create(word="cat", language="en")
+        create_synonym(dog, models.Word.objects.create(word="perro", language="es"))
+        create_synonym(dog, models.Word.objects.create(word="can", language="es"))
+
+    def assertSameAsSync(self, name, params):
+        expected = self.client.get(reverse(name), params)
+        # Bypass the results the sync view cached, but keep the data versions
+        with mock.patch("words.caching.cache", LocMemCache("async-views", {})):
+            response = self.client.get(reverse(f"async_{name}"), params)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+    def test_same_responses_as_sync_views(self):
+        self.assertSameAsSync("word", {"word": "dog", "language": "en"})
+        self.assertSameAsSync("word", {"word": "dog"})
+        self.assertSameAsSync("word", {"word": "dgo", "language": "en"})
+        self.assertSameAsSync("word", {})
+        self.assertSameAsSync("list_words", {"per_page": 2, "page": 2})
+        self.assertSameAsSync("list_words", {"per_page": 2, "page": 9})
+        self.assertSameAsSync("list_words", {"cursor": "", "per_page": 3, "total": "1"})
+        self.assertSameAsSync("list_words", {"cursor": "nope"})
+
+    def test_random_word(self):
+        response = self.client.get(reverse("async_random_word"), {"language": "es"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["data"]["synonyms"], ["dog"])
+        response = self.client.get(reverse("async_random_word"), {"language": "de"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_random_word_draws_from_the_fetched_table(self):
+        table = word_sampler.get_table("es")
+
+        def loaded_table(language):
+            # A write invalidates the table right after it was fetched
+            word_sampler.invalidate([language])
+            return table
+
+        with mock.patch.object(word_sampler, "loaded_table", loaded_table):
+            with mock.patch.object(word_sampler, "get_table", side_effect=AssertionError):
+                response = self.client.get(reverse("async_random_word"), {"language": "es"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cache_io_runs_in_a_thread(self):
+        params = {"word": "dog", "language": "en"}
+        with tempfile.TemporaryDirectory() as location:
+            file_cache = {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": location,
+            }
+            to_thread = mock.patch(
+                "words.caching.sync_to_async", wraps=wcache.sync_to_async
+            )
+            with override_settings(CACHES={"default": file_cache}), to_thread as to_thread:
+                response = self.client.get(reverse("async_word"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(to_thread.called)
+
+        with mock.patch("words.caching.sync_to_async") as to_thread:
+            self.client.get(reverse("async_word"), params)
+        to_thread.assert_not_called()
+
+    def test_not_modified_without_queries(self):
+        params = {"word": "dog", "language": "en"}
+        etag = self.client.get(reverse("async_word"), params)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse("async_word"), params, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_get_only(self):
+        response = self.client.post(reverse("async_list_words"))
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class BatchTestCase(TestCase):
+    def setUp(self):
+        fuzzy_index.invalidate()
+        self.dog = models.Word.objects.create(word="dog", language="en", strength=3)
+        create_synonym(self.dog, models.Word.objects.create(word="perro", language="es"))
+
+    def post(self, *operations):
+        return self.client.post(
+            reverse("batch"), {"operations": list(operations)}, content_type="application/json"
+        )
+
+    def test_applies_operations_in_order(self):
+        response = self.post(
+            {"op": "post_word", "word": "cat", "language": "en"},
+            {"op": "post_word", "word": "dog", "language": "en"},
+            {"op": "post_word", "word": "cat", "language": "en"},
+            {"op": "update_word_synonyms", "word": "cat", "language": "en",
+             "synonym_list": "gato, minino", "synonym_language": "es"},
+            {"op": "delete_word", "word": "perro"},
+            {"op": "delete_word", "word": "minino", "language": "es"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual([r["op"] for r in results][:3], ["post_word"] * 3)
+        self.assertEqual([r.get("created") for r in results[:3]], [True, False, False])
+        self.assertEqual(
+            set(models.Word.objects.values_list("word", flat=True)), {"cat", "dog", "gato"}
+        )
+        self.assertEqual(models.Word.objects.get(word="dog").strength, 0)
+        self.assertEqual(
+            list(models.Word.objects.get(word="cat").synonyms.values_list("word", flat=True)),
+            ["gato"],
+        )
+        self.assertFalse(self.dog.synonyms.exists())
+
+    def test_failure_rolls_back(self):
+        response = self.post(
+            {"op": "post_word", "word": "cat", "language": "en"},
+            {"op": "delete_word", "word": "dog"},
+            {"op": "delete_word", "word": "dog"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["index"], 2)
+        self.assertTrue(models.Word.objects.filter(word="dog").exists())
+        self.assertFalse(models.Word.objects.filter(word="cat").exists())
+
+        response = self.post({"op": "rename_word", "word": "dog"})
+        self.assertEqual(response.json()["index"], 0)
+        response = self.post({"op": "post_word", "word": "dog"})
+        self.assertIn("'language'", response.json()["error"])
+
+    def test_suggestions(self):
+        response = self.post({"op": "delete_word", "word": "dogg", "language": "en"})
+        self.assertEqual(response.json()["suggestions"], ["dog"])
+
+    def test_runs_cost_constant_queries(self):
+        def queries(n):
+            words = [f"w{i}" for i in range(n)]
+            with CaptureQueriesContext(connection) as context:
+                self.post(*[{"op": "post_word", "word": w, "language": "en"} for w in words])
+                self.post(*[{"op": "delete_word", "word": w} for w in words])
+            return len(context)
+
+        self.assertEqual(queries(2), queries(20))
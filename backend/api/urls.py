@@ -1,17 +1,33 @@
 from django.urls import path, include
-from api import views
+from api import async_views, views
 
 urlpatterns = [
     # Add your API endpoints here, for example:
     path("status/", views.get_status, name="get_status"),
+    path("cache-stats/", views.get_cache_stats, name="cache_stats"),
+    path("languages/", views.get_languages, name="languages"),
+    path("complete/", views.get_completions, name="complete"),
+    path("terminal/", views.post_terminal_input, name="terminal"),
     path("last-command/", views.get_last_command, name="get_last_command"),
     path("command-history/", views.post_command_history, name="post_command_history"),
     path("word/", views.get_word, name="word"),
     path("post-word/", views.post_word, name="post_word"),
     path("random-word/", views.get_random_word, name="random_word"),
+    path("random-words/", views.get_random_words, name="random_words"),
+    path("due-words/", views.get_due_words, name="due_words"),
+    path("review-results/", views.post_review_results, name="review_results"),
     path("delete-word/", views.delete_word, name="delete_word"),
+    path("export/", views.export_words, name="export_words"),
     path("list-words/", views.get_words_list, name="list_words"),
+    path(
+        "translation-pairs/", views.get_translation_pairs, name="translation_pairs"
+    ),
     path(
         "update-word-synonyms/", views.update_word_synonyms, name="update_word_synonyms"
     ),
+    path("batch/", views.post_batch, name="batch"),
+    # Async variants of the read endpoints, for the ASGI app
+    path("async/word/", async_views.get_word, name="async_word"),
+    path("async/random-word/", async_views.get_random_word, name="async_random_word"),
+    path("async/list-words/", async_views.get_words_list, name="async_list_words"),
 ]
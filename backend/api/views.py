@@ -1,16 +1,77 @@
+import hashlib
 import json
+import os
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from django.utils.timezone import now
+from django.views.decorators.http import condition, require_GET
 
-from terminal.input_context_handler import input_context_handler
-from words.words import words_terminal
+from terminal.sessions import terminal_sessions
 from terminal.terminal import default_terminal
+from terminal import history
 from terminal.models import CommandHistory
 from words import database_functions as wdbf
 from words import serializers as wser
+from words import caching as wcache
+from words import export as wexport
+from words import versions
+from words.models import Languages
+
+# Upper bound for the number of words returned by `random-words` and `due-words`
+MAX_RANDOM_WORDS = 100
+# Upper bound for the page size of `translation-pairs` and cursor `list-words`
+MAX_PAGE_SIZE = 1000
+# Upper bound for the number of suggestions of each kind returned by `complete`
+MAX_COMPLETIONS = 50
+# Upper bound for the number of operations of one `batch` request
+MAX_BATCH_SIZE = 1000
+
+
+def _data_version(request):
+    """Data version of the language a read request is about, once per request."""
+    if not hasattr(request, "_data_version"):
+        request._data_version = versions.get_version(request.GET.get("language"))
+    return request._data_version
+
+
+def _data_etag(request, *args, **kwargs):
+    version = _data_version(request)
+    return f'"{request.GET.get("language") or versions.ALL_LANGUAGES}-{version}"'
+
+
+# Answers If-None-Match with a 304 before the view (and the ORM) runs, based
+# on the per-language data version in words.versions. There is no
+# Last-Modified: at one second resolution it would answer 304 to a client
+# that read between two writes of the same second.
+conditional_on_data_version = condition(etag_func=_data_etag)
+
+# The languages never change while the server runs
+LANGUAGES_ETAG = '"languages-%s"' % hashlib.sha1(
+    json.dumps(Languages.choices).encode()
+).hexdigest()[:16]
+
+
+def _terminal_session(request, create=True):
+    """Terminal session (handler stack) of the client's Django session."""
+    if request.session.session_key is None:
+        if not create:
+            return None
+        request.session.save()
+    return terminal_sessions.get(request.session.session_key, create=create)
+
+
+def _get_count(value, maximum, name="n"):
+    """Parse a count query parameter, raising ValueError if it is out of range."""
+    try:
+        value = int(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"Parameter '{name}' must be an integer.")
+    if value < 1 or value > maximum:
+        raise ValueError(f"Parameter '{name}' must be between 1 and {maximum}.")
+    return value
 
 
 @api_view(["GET"])
@@ -19,6 +80,83 @@ def get_status(request):
     return Response({"status": "Server is running."}, status=status.HTTP_200_OK)
 
 
+@condition(etag_func=lambda request: LANGUAGES_ETAG)
+@api_view(["GET"])
+def get_languages(request):
+    """List the languages words can be in."""
+    languages = [{"value": value, "label": label} for value, label in Languages.choices]
+    return Response(
+        {
+            "message": "Found languages.",
+            "data": wser.LanguagesSerializer(languages, many=True).data,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@api_view(["GET"])
+def get_cache_stats(request):
+    """Hit/miss counters of the word lookup cache in this worker process."""
+    return Response(
+        {
+            "message": "Cache statistics.",
+            "backend": settings.CACHES["default"]["BACKEND"],
+            "pid": os.getpid(),
+            **wcache.cache_stats.as_dict(),
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@api_view(["GET"])
+def get_completions(request):
+    """
+    Complete the last token of the terminal input `q`, both as a word (of
+    `language`, if given) and as a command or option of the active terminal.
+    """
+    q = request.query_params.get("q", "")
+    language = request.query_params.get("language")
+    try:
+        k = _get_count(request.query_params.get("k", 10), MAX_COMPLETIONS, "k")
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    prefix = q.split(" ")[-1]
+    session = _terminal_session(request, create=False)
+    terminal = session.get_handlers()[-1] if session else default_terminal
+    try:
+        words = [] if prefix.startswith("-") else wdbf.complete_words(prefix, language, k)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    commands = terminal.complete(q, k) if hasattr(terminal, "complete") else []
+
+    return Response(
+        {
+            "message": f"Found {len(words) + len(commands)} completions.",
+            "words": words,
+            "commands": commands,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@api_view(["POST"])
+def post_terminal_input(request):
+    """
+    Run one line of terminal input. The WebSocket at `TERMINAL_WS_PATH` does
+    the same without a request per line.
+    """
+    line = request.data.get("input")
+    if line is None:
+        return Response(
+            {"error": "Parameter 'input' is required."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    output, handled = _terminal_session(request).handle_input(line)
+    return Response({"output": output, "handled": handled}, status=status.HTTP_200_OK)
+
+
 @api_view(["GET"])
 def get_last_command(request):
     """Fetch the last command from command history for a given index `i`."""
@@ -61,7 +199,7 @@ def post_command_history(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    CommandHistory.objects.create(command=command, timestamp=now())
+    history.record(command)
     return Response(
         {"message": "Command history updated successfully."},
         status=status.HTTP_201_CREATED,
@@ -118,6 +256,7 @@ def delete_word(request):
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@conditional_on_data_version
 @api_view(["GET"])
 def get_word(request):
     """Retrieve a specific word and its metadata."""
@@ -131,16 +270,26 @@ def get_word(request):
         )
 
     try:
-        word_obj = wdbf.get_word(word, language)
+        data = wcache.get_or_compute(
+            "word",
+            language,
+            {"word": word},
+            lambda: wser.WordSerializer(wdbf.get_word(word, language)).data,
+        )
         return Response(
             {
                 "message": f"Word '{word}' found.",
-                "data": wser.WordSerializer(word_obj).data,
+                "data": data,
             },
             status=status.HTTP_200_OK,
         )
     except LookupError as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except wdbf.WordNotFound as e:
+        return Response(
+            {"error": str(e), "suggestions": e.suggestions},
+            status=status.HTTP_404_NOT_FOUND,
+        )
     except ValueError as e:
         return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
@@ -173,27 +322,234 @@ def get_random_word(request):
 
 
 @api_view(["GET"])
-def get_words_list(request):
-    """Paginated list of words, optionally filtered by language."""
+def get_random_words(request):
+    """Retrieve `n` distinct random words, weighted by frequency or relevance."""
     language = request.query_params.get("language")
-    page = request.query_params.get("page", 1)
-    per_page = request.query_params.get("per_page", 10)
+    n = request.query_params.get("n", 10)
+    if not language:
+        return Response(
+            {"error": "Missing required parameter: 'language'."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        n = _get_count(n, MAX_RANDOM_WORDS)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        words, pages, page, total = wdbf.get_words_list(language, page, per_page)
+        words = wdbf.get_weighted_words(language, n)
         return Response(
             {
-                "message": "Found page of words.",
+                "message": f"Found {len(words)} words.",
                 "data": wser.WordSerializer(words, many=True).data,
-                "page": page,
-                "pages": pages,
-                "total": total,
             },
             status=status.HTTP_200_OK,
         )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+def get_due_words(request):
+    """Retrieve the next `n` words that are due for review, most overdue first."""
+    language = request.query_params.get("language")
+    n = request.query_params.get("n", 10)
+    if not language:
+        return Response(
+            {"error": "Missing required parameter: 'language'."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        n = _get_count(n, MAX_RANDOM_WORDS)
+        words = wdbf.get_due_words(language, n)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response(
+        {
+            "message": f"Found {len(words)} due words.",
+            "data": wser.WordSerializer(words, many=True).data,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@api_view(["POST"])
+def post_review_results(request):
+    """Apply a batch of review results ({word, language, correct, seen_at})."""
+    results = request.data.get("results")
+    if not isinstance(results, list) or not results:
+        return Response(
+            {"error": "Parameter 'results' must be a non-empty list."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        updated, missing = wdbf.apply_review_results(results)
+    except (ValueError, AttributeError) as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response(
+        {
+            "message": f"Applied reviews to {updated} words.",
+            "updated": updated,
+            "missing": [{"word": w, "language": l} for w, l in missing],
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@require_GET
+def export_words(request):
+    """
+    Stream every word of a language with its translations as csv or jsonl.
+    A plain Django view: DRF would treat `?format=` as a renderer override.
+    """
+    language = request.GET.get("language")
+    translation = request.GET.get("translation")
+    format = request.GET.get("format", "csv")
+    if not language:
+        return JsonResponse(
+            {"error": "Missing required parameter: 'language'."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        chunks = wexport.export_words(language, translation, format=format)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(
+        chunks, content_type=wexport.EXPORT_FORMATS[format]
+    )
+    response["Content-Disposition"] = f'attachment; filename="words-{language}.{format}"'
+    return response
+
+
+@api_view(["GET"])
+def get_translation_pairs(request):
+    """Page through the (word, translation) pairs between two languages."""
+    language = request.query_params.get("from")
+    translation_language = request.query_params.get("to")
+    after = request.query_params.get("after")
+    limit = request.query_params.get("limit", 100)
+    if not language or not translation_language:
+        return Response(
+            {"error": "Missing required parameters: 'from' or 'to'."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        limit = _get_count(limit, MAX_PAGE_SIZE, name="limit")
+        pairs, next = wdbf.get_translation_pairs(
+            language, translation_language, after=after, limit=limit
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    return Response(
+        {
+            "message": f"Found {len(pairs)} translation pairs.",
+            "data": [{"word": w, "translation": t} for w, t in pairs],
+            "next": next,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@conditional_on_data_version
+@api_view(["GET"])
+def get_words_list(request):
+    """
+    Paginated list of words, optionally filtered by language.
+    Passing `cursor` (empty for the first page) switches to keyset pagination:
+    the response carries a `next` cursor instead of page numbers, and the
+    total is only included when `total=true`.
+    """
+    language = request.query_params.get("language")
+    page = request.query_params.get("page", 1)
+    per_page = request.query_params.get("per_page", 10)
+
+    if "cursor" in request.query_params:
+        return _get_words_cursor(request, language, per_page)
+
+    def compute():
+        words, pages, current, total = wdbf.get_words_list(language, page, per_page)
+        return {
+            "message": "Found page of words.",
+            "data": wser.WordSerializer(words, many=True).data,
+            "page": current,
+            "pages": pages,
+            "total": total,
+        }
+
+    try:
+        data = wcache.get_or_compute(
+            "list", language, {"page": page, "per_page": per_page}, compute
+        )
+        return Response(data, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _get_words_cursor(request, language, per_page):
+    """Keyset paginated variant of `get_words_list`."""
+    cursor = request.query_params.get("cursor")
+    with_total = request.query_params.get("total", "").lower() in ("true", "1", "yes")
+
+    def compute():
+        words, next = wdbf.get_words_cursor(language, cursor, per_page)
+        data = {
+            "message": "Found page of words.",
+            "data": wser.WordSerializer(words, many=True).data,
+            "next": next,
+        }
+        if with_total:
+            data["total"] = wdbf.count_words(language)
+        return data
+
+    try:
+        per_page = _get_count(per_page, MAX_PAGE_SIZE, name="per_page")
+        data = wcache.get_or_compute(
+            "cursor",
+            language,
+            {"cursor": cursor, "per_page": per_page, "total": with_total},
+            compute,
+        )
+        return Response(data, status=status.HTTP_200_OK)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _parse_synonym_list(synonym_list):
+    """Parse `synonym_list` as a list: a JSON array, comma separated words or one word."""
+    if isinstance(synonym_list, str):
+        # Try to parse as JSON array
+        try:
+            parsed = json.loads(synonym_list)
+            if isinstance(parsed, list):
+                return parsed
+        except Exception:
+            pass
+        # Fallback: split by comma
+        return [s.strip() for s in synonym_list.split(",") if s.strip()]
+    elif not isinstance(synonym_list, list):
+        # If not a list or string, make it a single-item list
+        return [str(synonym_list)]
+    return synonym_list
+
 
 @api_view(["POST"])
 def update_word_synonyms(request):
@@ -212,28 +568,11 @@ def update_word_synonyms(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    # Parse synonym_list as a list
-    if isinstance(synonym_list, str):
-        # Try to parse as JSON array
-        try:
-            parsed = json.loads(synonym_list)
-            if isinstance(parsed, list):
-                synonym_list = parsed
-            else:
-                # Fallback: split by comma
-                synonym_list = [s.strip() for s in synonym_list.split(",") if s.strip()]
-        except Exception:
-            # Fallback: split by comma
-            synonym_list = [s.strip() for s in synonym_list.split(",") if s.strip()]
-    elif not isinstance(synonym_list, list):
-        # If not a list or string, make it a single-item list
-        synonym_list = [str(synonym_list)]
-
     try:
         word_obj, synonyms = wdbf.update_word_synonyms(
             word_str=word,
             language=language,
-            synonym_strs=synonym_list,
+            synonym_strs=_parse_synonym_list(synonym_list),
             synonym_language=synonym_language,
         )
         message = (
@@ -251,3 +590,43 @@ def update_word_synonyms(request):
         )
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(["POST"])
+def post_batch(request):
+    """
+    Apply an ordered list of `post_word`, `delete_word` and
+    `update_word_synonyms` operations in one transaction, e.g.
+    `{"operations": [{"op": "post_word", "word": "dog", "language": "en"}]}`.
+    Either every operation is applied and the response lists their results,
+    or none is and the response names the one that failed.
+    """
+    operations = request.data.get("operations")
+    if not isinstance(operations, list) or not all(
+        isinstance(o, dict) for o in operations
+    ):
+        return Response(
+            {"error": "Parameter 'operations' must be a list of objects."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(operations) > MAX_BATCH_SIZE:
+        return Response(
+            {"error": f"At most {MAX_BATCH_SIZE} operations can be sent at once."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    for o in operations:
+        if o.get("op") == "update_word_synonyms" and o.get("synonym_list"):
+            o["synonym_list"] = _parse_synonym_list(o["synonym_list"])
+
+    try:
+        results = wdbf.apply_batch(operations)
+    except wdbf.BatchError as e:
+        body = {"error": str(e), "index": e.index}
+        if isinstance(e.error, wdbf.WordNotFound):
+            body["suggestions"] = e.error.suggestions
+        return Response(body, status=status.HTTP_400_BAD_REQUEST)
+    return Response(
+        {"message": f"Applied {len(results)} operations.", "results": results},
+        status=status.HTTP_200_OK,
+    )
@@ -1,5 +1,6 @@
 from django.contrib import admin
 import terminal.models as models
+from terminal import history
 
 # Register your models here.
 
@@ -9,10 +10,17 @@ class CommandHistoryAdmin(admin.ModelAdmin):
     list_display = ("command", "timestamp")
     search_fields = ("command",)
     list_filter = ("timestamp",)
-    ordering = ("-timestamp",)
+    ordering = history.ORDERING
+    actions = ("prune_history",)
 
     def has_add_permission(self, request, obj=None):
         return False
 
     def has_change_permission(self, request, obj=None):
         return False
+
+    @admin.action(description="Prune history by the retention policy")
+    def prune_history(self, request, queryset):
+        # Applies to the whole table, the selection only triggers the action
+        deleted = history.prune()
+        self.message_user(request, f"Pruned {deleted} commands.")
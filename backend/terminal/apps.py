@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TerminalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'terminal'
+
+    def ready(self):
+        import terminal.signals  # noqa: F401
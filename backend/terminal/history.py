@@ -0,0 +1,216 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+import terminal.models as models
+
+# Newest first, the id breaks ties between commands stored in the same instant
+ORDERING = ("-timestamp", "-id")
+
+_COUNT_KEY = "terminal:history:count"
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryCounter:
+    """
+    Number of stored commands, kept in Django's cache so that every worker
+    sharing the cache sees the same value. Bumped on each recorded command
+    and dropped whenever rows are deleted.
+    """
+
+    def count(self):
+        count = cache.get(_COUNT_KEY)
+        if count is None:
+            count = models.CommandHistory.objects.count()
+            cache.set(_COUNT_KEY, count, timeout=None)
+        return count
+
+    def incr(self, n=1):
+        """Add `n` to the count and return the new value."""
+        self.count()
+        try:
+            return cache.incr(_COUNT_KEY, n)
+        except ValueError:
+            # Evicted between the two calls
+            return self.count()
+
+    def invalidate(self):
+        cache.delete(_COUNT_KEY)
+
+
+history_counter = HistoryCounter()
+
+
+def _ordered():
+    return models.CommandHistory.objects.order_by(*ORDERING)
+
+
+class HistoryWriter:
+    """
+    Write-behind buffer for the command history.
+
+    `record` only appends to an in-memory queue (with the timestamp of the
+    call), the rows are written with one `bulk_create` by `flush`, which runs:
+    - after a request has been answered, once the buffer holds
+      `settings.TERMINAL_HISTORY_FLUSH_SIZE` commands or its oldest command is
+      `settings.TERMINAL_HISTORY_FLUSH_INTERVAL` seconds old,
+    - before the history is read,
+    - when the process exits.
+
+    The buffer holds at most `settings.TERMINAL_HISTORY_BUFFER_SIZE` commands.
+    When it is full `settings.TERMINAL_HISTORY_OVERFLOW` decides: "flush"
+    writes the buffer right away, "drop" discards the oldest command.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffer = deque()
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def record(self, command: str):
+        """Queue a command for the history."""
+        entry = models.CommandHistory(command=command, timestamp=timezone.now())
+        with self._lock:
+            full = len(self._buffer) >= settings.TERMINAL_HISTORY_BUFFER_SIZE
+            if full and settings.TERMINAL_HISTORY_OVERFLOW == "drop":
+                self._buffer.popleft()
+                self.dropped += 1
+                full = False
+            self._buffer.append((time.monotonic(), entry))
+        if full:
+            self.flush()
+        return entry
+
+    def should_flush(self):
+        with self._lock:
+            if not self._buffer:
+                return False
+            if len(self._buffer) >= settings.TERMINAL_HISTORY_FLUSH_SIZE:
+                return True
+            queued_at, _ = self._buffer[0]
+        return time.monotonic() - queued_at >= settings.TERMINAL_HISTORY_FLUSH_INTERVAL
+
+    def flush(self):
+        """
+        Write every queued command and prune the history each time another
+        `settings.TERMINAL_HISTORY_PRUNE_EVERY` commands have been stored.
+        Nothing is lost when the write fails: the commands stay queued and
+        the error is raised.
+        :return: Number of written commands.
+        """
+        with self._lock:
+            queued = list(self._buffer)
+            self._buffer.clear()
+        if not queued:
+            return 0
+
+        entries = [entry for _, entry in queued]
+        try:
+            # All or nothing, bulk_create runs its INSERTs in one transaction
+            models.CommandHistory.objects.bulk_create(entries)
+        except Exception:
+            # Queue them again, ahead of anything recorded in the meantime
+            with self._lock:
+                self._buffer.extendleft(reversed(queued))
+            raise
+        count = history_counter.incr(len(entries))
+        every = settings.TERMINAL_HISTORY_PRUNE_EVERY
+        if every and count // every > (count - len(entries)) // every:
+            prune()
+        return len(entries)
+
+    def flush_if_due(self):
+        if self.should_flush():
+            self.flush()
+
+    def discard(self):
+        """Forget the queued commands without writing them."""
+        with self._lock:
+            self._buffer.clear()
+
+
+history_writer = HistoryWriter()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        history_writer.flush()
+    except Exception:
+        logger.exception("Could not flush %d history commands", len(history_writer))
+
+
+def record(command: str):
+    """Queue a command for the history, see `HistoryWriter`."""
+    return history_writer.record(command)
+
+
+def flush():
+    """Write the queued commands, see `HistoryWriter.flush`."""
+    return history_writer.flush()
+
+
+def get_last_command(i: int):
+    """
+    Get the `i`-th most recent command (0 is the latest) with a single
+    OFFSET/LIMIT query. Indices past the end are clamped to the oldest entry.
+    Queued commands are flushed first.
+    :return: (CommandHistory or None, clamped index)
+    """
+    history_writer.flush()
+    i = min(i, history_counter.count() - 1)
+    if i < 0:
+        return (None, i)
+
+    command = _ordered()[i : i + 1].first()
+    if command is None:
+        # The cached count was ahead of the table, e.g. another worker pruned
+        history_counter.invalidate()
+        i = min(i, history_counter.count() - 1)
+        command = _ordered()[i : i + 1].first() if i >= 0 else None
+    return (command, i)
+
+
+def prune(max_rows=None, max_age=None, now=None):
+    """
+    Delete the commands that fall outside the retention policy.
+    :param max_rows: Number of most recent commands to keep, `None` for
+        `settings.TERMINAL_HISTORY_MAX_ROWS` (a setting of `None` keeps all).
+    :param max_age: Maximum age as a timedelta, `None` for
+        `settings.TERMINAL_HISTORY_MAX_AGE_DAYS` (a setting of `None` keeps all).
+    :return: Number of deleted commands.
+    """
+    if max_rows is None:
+        max_rows = settings.TERMINAL_HISTORY_MAX_ROWS
+    if max_age is None and settings.TERMINAL_HISTORY_MAX_AGE_DAYS is not None:
+        max_age = timedelta(days=settings.TERMINAL_HISTORY_MAX_AGE_DAYS)
+
+    condition = Q()
+    if max_age is not None:
+        condition |= Q(timestamp__lt=(now or timezone.now()) - max_age)
+    if max_rows is not None:
+        # Everything at or after the first row past the limit goes
+        boundary = _ordered().values_list("timestamp", "id")[max_rows : max_rows + 1]
+        boundary = boundary.first()
+        if boundary is not None:
+            timestamp, pk = boundary
+            condition |= Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lte=pk)
+    if not condition:
+        return 0
+
+    deleted, _ = models.CommandHistory.objects.filter(condition).delete()
+    if deleted:
+        history_counter.invalidate()
+    return deleted
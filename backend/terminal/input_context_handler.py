@@ -1,18 +1,28 @@
-from terminal.terminal import default_terminal, Command
+import sys
+import threading
+
+from django.conf import settings
+
+from terminal.pager import MORE_COMMANDS, Pager
+from terminal.terminal import current_context, default_terminal
 from words.words import words_terminal
-from terminal.terminal import default_terminal
 
 
 class InputContextHandler:
-    _instance = None
+    """
+    The stack of input handlers (terminals) of one session, the innermost
+    handler last, along with the session's pending paged output.
+    """
 
-    def __new__(cls, input_handlers=[]):
-        if cls._instance is None:
-            cls._instance = super(InputContextHandler, cls).__new__(cls)
-            cls._instance.input_handlers = input_handlers
-        return cls._instance
+    def __init__(self, input_handlers=None):
+        self.input_handlers = list(input_handlers or [])
+        self.pager = None
+        # Serializes inputs of the same session arriving on several threads
+        self._lock = threading.Lock()
 
     def push_handler(self, handler):
+        if len(self.input_handlers) >= settings.TERMINAL_SESSION_MAX_DEPTH:
+            raise ValueError("Too many nested terminals, exit one first.")
         self.input_handlers.append(handler)
 
     def pop_handler(self):
@@ -23,18 +33,99 @@ class InputContextHandler:
     def get_handlers(self):
         return self.input_handlers
 
-    def handle_input(self, input_str):
-        if not self.input_handlers:
-            raise ValueError("No input handlers available")
+    def memory_size(self):
+        """Approximate number of bytes held by this session."""
+        size = sys.getsizeof(self) + sys.getsizeof(self.input_handlers)
+        if self.pager is not None:
+            size += self.pager.memory_size()
+        return size
+
+    def next_page(self):
+        """Serve the next page of the pending paged output."""
+        output, exhausted = self.pager.next_page()
+        if exhausted:
+            self.pager = None
+        else:
+            output += f"-- more, type '{MORE_COMMANDS[0]}' to continue --\n"
+        return output
 
+    def _run(self, input_str):
+        """
+        Pass the input down the handler stack.
+        :return: The output (a `Pager` for long output), `None` if unhandled.
+        """
+        # Lets commands such as `create_relation`'s switch and exit find
+        # the session they run in
+        token = current_context.set(self)
         try:
             for handler in reversed(self.input_handlers):
                 output, handled = handler.handle_input(input_str)
                 if handled:
-                    return (output + self.input_handlers[-1].prompt, True)
+                    return output
+            return None
+        finally:
+            current_context.reset(token)
+
+    def handle_input(self, input_str):
+        with self._lock:
+            return self._handle_input(input_str)
+
+    def _handle_input(self, input_str):
+        if not self.input_handlers:
+            raise ValueError("No input handlers available")
+
+        try:
+            if self.pager is not None and input_str.strip() in MORE_COMMANDS:
+                return (self.next_page() + self.input_handlers[-1].prompt, True)
+            # Any other input abandons the pending output
+            self.pager = None
+
+            output = self._run(input_str)
+            if output is None:
+                return ("", False)
+            if isinstance(output, Pager):
+                self.pager = output
+                output = self.next_page()
+            return (output + self.input_handlers[-1].prompt, True)
         except Exception as e:
+            self.pager = None
             return (str(e), False)
-        return ("", False)
+
+    def stream_input(self, input_str):
+        """
+        Like `handle_input`, but long output is yielded page by page without
+        waiting for 'more', followed by the prompt. Every step may query the
+        database, so async callers should advance it in a worker thread.
+        :return: Generator of (kind, text), kind being "output", "error" or
+            "prompt" (always last).
+        """
+        if not self.input_handlers:
+            raise ValueError("No input handlers available")
+        self.pager = None
+
+        try:
+            with self._lock:
+                output = self._run(input_str)
+            if isinstance(output, Pager):
+                exhausted = False
+                while not exhausted:
+                    text, exhausted = output.next_page()
+                    yield ("output", text)
+            elif output:
+                yield ("output", output)
+        except Exception as e:
+            yield ("error", str(e))
+        yield ("prompt", self.input_handlers[-1].prompt)
+
+
+def new_session():
+    """Handler stack a new terminal session starts with."""
+    return InputContextHandler([default_terminal])
 
 
-input_context_handler = InputContextHandler([default_terminal])
+default_terminal.create_relation(
+    words_terminal,
+    "words",
+    command_description="Manage the words in the database.",
+    welcome_message="Entered the words terminal, type 'help' for its commands.",
+)
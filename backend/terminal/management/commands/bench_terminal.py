@@ -0,0 +1,152 @@
+import re
+import time
+
+from django.core.management.base import BaseCommand
+from terminal.terminal import Command as TerminalCommand, Parameter, Terminal
+
+
+def legacy_parse(command):
+    """The tokenizer `Terminal` used before dispatch was compiled."""
+    command_split = command.split()
+    command = command_split[0] if command_split else None
+    args = []
+    kwargs = {}
+    for item in command_split[1:]:
+        if item.startswith("--") and "=" in item:
+            key, value = item[2:].split("=", 1)
+            kwargs[key] = value
+        elif item.startswith("--"):
+            key = item[2:]
+            next_index = command_split.index(item) + 1
+            if next_index < len(command_split) and not command_split[
+                next_index
+            ].startswith("-"):
+                kwargs[key] = command_split[next_index]
+            else:
+                kwargs[key] = True
+        elif item.startswith("-") and "=" in item:
+            key, value = item[1:].split("=", 1)
+            kwargs[key] = value
+        elif item.startswith("-"):
+            key = item[1:]
+            next_index = command_split.index(item) + 1
+            if next_index < len(command_split) and not command_split[
+                next_index
+            ].startswith("-"):
+                kwargs[key] = command_split[next_index]
+            else:
+                kwargs[key] = True
+        else:
+            args.append(item)
+    return command, args, kwargs
+
+
+def legacy_call(command, *args, **kwargs):
+    """The parameter binding `Command.__call__` did before it was precomputed."""
+    position = 0
+    new_kwargs = {}
+    for param in command.params:
+        if (
+            param.required
+            and not param.positional
+            and param.name not in kwargs
+            and param.ailias not in kwargs
+        ):
+            raise ValueError(f"Missing required parameter: {param.name}")
+        if param.name in kwargs or param.ailias in kwargs:
+            if param.ailias and param.ailias in kwargs:
+                value = kwargs[param.ailias]
+            else:
+                value = kwargs[param.name]
+            new_kwargs[param.name] = param.datatype(value)
+        if param.positional:
+            if position < len(args):
+                new_kwargs[param.name] = param.datatype(args[position])
+            else:
+                raise ValueError(f"Missing required positional parameter: {param.name}")
+            position += 1
+    return command.func(**new_kwargs)
+
+
+def legacy_dispatch(commands, line):
+    command, args, kwargs = legacy_parse(line)
+    if command not in commands:
+        return None
+    for key in commands:
+        if re.fullmatch(key, command):
+            return legacy_call(commands[key], *args, **kwargs)
+    return None
+
+
+def compiled_dispatch(terminal, line):
+    command, args, kwargs = terminal._parse_command(line)
+    matched = terminal._resolve(command)
+    if matched is None:
+        return None
+    return matched(*args, **kwargs)
+
+
+class Command(BaseCommand):
+    help = "Compare terminal parsing and dispatch throughput before and after compilation"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--commands",
+            type=int,
+            default=50,
+            help="Number of commands attached to the terminal (default: 50)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20000,
+            help="Number of inputs dispatched per run (default: 20000)",
+        )
+
+    def build_terminal(self, n):
+        params = [
+            Parameter("word", str, "", positional=True),
+            Parameter("language", str, "", ailias="l"),
+            Parameter("n", int, ""),
+            Parameter("verbose", bool, "", ailias="v"),
+        ]
+        return Terminal(
+            [
+                TerminalCommand(
+                    lambda **kwargs: kwargs, name=f"cmd{i}", params=list(params)
+                )
+                for i in range(n)
+            ]
+        )
+
+    def run(self, dispatch, lines, iterations):
+        start = time.perf_counter()
+        for i in range(iterations):
+            dispatch(lines[i % len(lines)])
+        return iterations / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        n = options["commands"]
+        terminal = self.build_terminal(n)
+        # Later commands are the worst case for a linear scan
+        lines = [
+            f"cmd{i} word{i} --language en -n 5 -v --language es"
+            for i in range(n - 1, 0, -7)
+        ]
+
+        legacy = self.run(
+            lambda line: legacy_dispatch(terminal._commands, line),
+            lines,
+            options["iterations"],
+        )
+        compiled = self.run(
+            lambda line: compiled_dispatch(terminal, line),
+            lines,
+            options["iterations"],
+        )
+
+        self.stdout.write(f"legacy:   {legacy:,.0f} inputs/s")
+        self.stdout.write(f"compiled: {compiled:,.0f} inputs/s")
+        self.stdout.write(
+            self.style.SUCCESS(f"Speedup: {compiled / legacy:.2f}x with {n} commands")
+        )
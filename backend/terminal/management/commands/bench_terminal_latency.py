@@ -0,0 +1,128 @@
+import asyncio
+import json
+import statistics
+import time
+
+from asgiref.testing import ApplicationCommunicator
+from django.core.management.base import BaseCommand
+
+HEADERS = [(b"host", b"localhost")]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the latency of terminal input sent as HTTP requests to "
+        "/api/terminal/ with input sent over the terminal WebSocket, both "
+        "driven in-process through the ASGI application"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--input",
+            type=str,
+            default="status",
+            help="Terminal input sent on every round trip (default: status)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=500,
+            help="Number of round trips per transport (default: 500)",
+        )
+
+    async def http_round_trip(self, application, line, cookies=()):
+        body = json.dumps({"input": line}).encode()
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "POST",
+            "path": "/api/terminal/",
+            "raw_path": b"/api/terminal/",
+            "query_string": b"",
+            "root_path": "",
+            "scheme": "http",
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 50000),
+            "headers": HEADERS
+            + [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ]
+            + [(b"cookie", cookie) for cookie in cookies],
+        }
+        communicator = ApplicationCommunicator(application, scope)
+        await communicator.send_input(
+            {"type": "http.request", "body": body, "more_body": False}
+        )
+        start = await communicator.receive_output(timeout=30)
+        if start["status"] != 200:
+            raise RuntimeError(f"HTTP request failed with status {start['status']}")
+        while (await communicator.receive_output(timeout=30)).get("more_body"):
+            pass
+        await communicator.wait(timeout=30)
+        return [
+            value.split(b";", 1)[0]
+            for name, value in start["headers"]
+            if name.lower() == b"set-cookie"
+        ]
+
+    async def measure_http(self, application, line, iterations):
+        # Keep one terminal session like a browser would
+        cookies = await self.http_round_trip(application, line)
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await self.http_round_trip(application, line, cookies)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    async def measure_websocket(self, application, line, iterations):
+        from django.conf import settings
+
+        scope = {"type": "websocket", "path": settings.TERMINAL_WS_PATH, "headers": HEADERS}
+        communicator = ApplicationCommunicator(application, scope)
+        await communicator.send_input({"type": "websocket.connect"})
+        await communicator.receive_output(timeout=30)  # accept
+        await communicator.receive_output(timeout=30)  # first prompt
+
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await communicator.send_input({"type": "websocket.receive", "text": line})
+            while True:
+                message = await communicator.receive_output(timeout=30)
+                if json.loads(message["text"])["type"] == "prompt":
+                    break
+            latencies.append(time.perf_counter() - start)
+
+        await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+        await communicator.wait(timeout=30)
+        return latencies
+
+    def report(self, name, latencies):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{name:<10} mean {statistics.mean(latencies) * 1000:7.3f} ms  "
+            f"p50 {statistics.median(latencies) * 1000:7.3f} ms  "
+            f"p95 {p95 * 1000:7.3f} ms"
+        )
+        return statistics.mean(latencies)
+
+    async def measure(self, line, iterations):
+        from thyme_server.asgi import application
+
+        return (
+            await self.measure_http(application, line, iterations),
+            await self.measure_websocket(application, line, iterations),
+        )
+
+    def handle(self, *args, **options):
+        http, websocket = asyncio.run(
+            self.measure(options["input"], options["iterations"])
+        )
+        http = self.report("http", http)
+        websocket = self.report("websocket", websocket)
+        self.stdout.write(
+            self.style.SUCCESS(f"WebSocket round trips are {http / websocket:.1f}x faster")
+        )
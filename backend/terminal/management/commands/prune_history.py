@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from terminal import history
+
+
+class Command(BaseCommand):
+    help = "Delete terminal command history outside the retention policy"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-rows",
+            type=int,
+            default=None,
+            help="Number of most recent commands to keep "
+            "(default: TERMINAL_HISTORY_MAX_ROWS)",
+        )
+        parser.add_argument(
+            "--max-age-days",
+            type=int,
+            default=None,
+            help="Delete commands older than this many days "
+            "(default: TERMINAL_HISTORY_MAX_AGE_DAYS)",
+        )
+
+    def handle(self, *args, **options):
+        max_age = options["max_age_days"]
+        deleted = history.prune(
+            max_rows=options["max_rows"],
+            max_age=timedelta(days=max_age) if max_age is not None else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} commands"))
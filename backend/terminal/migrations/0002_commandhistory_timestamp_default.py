@@ -0,0 +1,19 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:07
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('terminal', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='commandhistory',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
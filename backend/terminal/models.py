@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CommandHistory(models.Model):
@@ -7,7 +8,8 @@ class CommandHistory(models.Model):
     """
 
     command = models.CharField(max_length=255)
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Set when the command is entered, it may be written to the table later
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
 
     def __str__(self):
         return f"{self.command} at {self.timestamp}"
@@ -15,11 +17,10 @@ class CommandHistory(models.Model):
     @staticmethod
     def get_last_command(i: int):
         """
-        Get the most recent command history entries.
-        :param limit: Number of recent entries to retrieve.
-        :return: QuerySet of CommandHistory objects.
+        Get the `i`-th most recent command history entry.
+        :param i: Index into the history, 0 being the latest command.
+        :return: (CommandHistory or None, clamped index)
         """
-        query = CommandHistory.objects.order_by("-timestamp")
-        if i >= len(query):
-            i = len(query) - 1
-        return ((query[i] if i >= 0 else None), i)
+        from terminal.history import get_last_command
+
+        return get_last_command(i)
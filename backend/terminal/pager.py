@@ -0,0 +1,38 @@
+import sys
+from itertools import islice
+
+# Number of lines sent back per page of a long command output
+PAGE_SIZE = 50
+# Inputs that continue a paged output
+MORE_COMMANDS = ("more", "next")
+
+
+class Pager:
+    """
+    Serves the lines of a lazily produced command output one page at a time.
+    Commands return a generator of lines, the pager only pulls as many of
+    them as the page needs.
+    """
+
+    def __init__(self, lines, page_size=PAGE_SIZE):
+        self._lines = iter(lines)
+        self._lookahead = []
+        self.page_size = page_size
+        self.exhausted = False
+
+    def next_page(self):
+        """
+        Return the next page of output.
+        :return: (text, exhausted) where `exhausted` tells whether this was the last page.
+        """
+        lines = self._lookahead + list(
+            islice(self._lines, self.page_size + 1 - len(self._lookahead))
+        )
+        self._lookahead = lines[self.page_size :]
+        self.exhausted = not self._lookahead
+        page = lines[: self.page_size]
+        return ("\n".join(str(line) for line in page) + "\n" if page else ""), self.exhausted
+
+    def memory_size(self):
+        """Approximate number of bytes held by the pager between pages."""
+        return sys.getsizeof(self) + sum(sys.getsizeof(line) for line in self._lookahead)
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from terminal.input_context_handler import new_session
+
+
+class SessionStore:
+    """
+    Thread-safe LRU of terminal sessions (`InputContextHandler`s) keyed by a
+    session or connection id.
+
+    Sessions idle for `settings.TERMINAL_SESSION_IDLE_TIMEOUT` seconds are
+    evicted, and the least recently used ones go first whenever there are
+    more than `settings.TERMINAL_SESSIONS_MAX` sessions or they hold more than
+    `settings.TERMINAL_SESSIONS_MAX_BYTES` bytes together.
+
+    The byte limit is approximate: sessions are measured shallowly (see
+    `InputContextHandler.memory_size`), each one whenever it is looked up, so
+    the size of a session reflects its pending output as of its last input.
+    """
+
+    def __init__(self, factory=new_session):
+        self._factory = factory
+        self._lock = threading.Lock()
+        # Session id -> (handler, last used, size), least recently used first
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def _evict_idle(self, now):
+        timeout = settings.TERMINAL_SESSION_IDLE_TIMEOUT
+        while self._sessions:
+            _, last_used, _ = next(iter(self._sessions.values()))
+            if now - last_used < timeout:
+                return
+            self._pop()
+            self.evicted += 1
+
+    def _pop(self, session_id=None):
+        if session_id is None:
+            _, (_, _, size) = self._sessions.popitem(last=False)
+        else:
+            _, _, size = self._sessions.pop(session_id)
+        self._bytes -= size
+
+    def _store(self, session_id, handler, now):
+        """Mark a session as most recently used and measure it again."""
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            self._bytes -= entry[2]
+        size = handler.memory_size()
+        self._sessions[session_id] = (handler, now, size)
+        self._sessions.move_to_end(session_id)
+        self._bytes += size
+
+    def _evict_oversized(self):
+        # The most recently used session, the one being handed out, stays
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > settings.TERMINAL_SESSIONS_MAX
+            or self._bytes > settings.TERMINAL_SESSIONS_MAX_BYTES
+        ):
+            self._pop()
+            self.evicted += 1
+
+    def get(self, session_id, create=True):
+        """
+        Return the handler stack of a session, starting a new one if needed.
+        :param create: Return `None` for unknown sessions instead.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                handler = entry[0]
+            elif create:
+                handler = self._factory()
+            else:
+                return None
+            # A session grows between lookups when its input leaves paged output
+            self._store(session_id, handler, now)
+            self._evict_oversized()
+            return handler
+
+    def drop(self, session_id):
+        """Forget a session, e.g. when its connection closes."""
+        with self._lock:
+            if session_id in self._sessions:
+                self._pop(session_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "evicted": self.evicted,
+            }
+
+
+terminal_sessions = SessionStore()
@@ -0,0 +1,18 @@
+import logging
+
+from django.core.signals import request_finished
+from django.dispatch import receiver
+
+from terminal.history import history_writer
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(request_finished)
+def flush_history(sender, **kwargs):
+    # The response is already out, so the write does not delay the command.
+    # A failed write keeps the commands queued for the next flush.
+    try:
+        history_writer.flush_if_due()
+    except Exception:
+        logger.exception("Could not flush %d history commands", len(history_writer))
@@ -1,9 +1,90 @@
 import inspect
 import logging
-import terminal.models as models
+import shlex
+from bisect import bisect_left, insort
+from contextvars import ContextVar
+from collections.abc import Iterator
+from terminal import history
 from terminal.input_handler import InputHandler
+from terminal.pager import Pager
 import re
 
+# Input context handler (session) of the input being handled, set by
+# InputContextHandler while it runs a command
+current_context = ContextVar("current_context")
+
+# Options that never take a value unless a command defines them itself
+HELP_OPTIONS = ("h", "help")
+
+_QUOTING = re.compile(r"[\"'\\]")
+# An apostrophe inside a word (aujourd'hui, l'eau, don't) is not a quote
+_ELISION = re.compile(r"(?<=\w)'(?=\w)")
+# Stands in for those apostrophes while shlex runs
+_APOSTROPHE = "\x00"
+
+
+def complete_prefix(values, prefix, limit=None):
+    """Entries of the sorted list `values` that start with `prefix`."""
+    start = bisect_left(values, prefix)
+    stop = bisect_left(values, prefix + "\U0010ffff", lo=start)
+    if limit is not None:
+        stop = min(stop, start + limit)
+    return values[start:stop]
+
+
+def tokenize(text: str):
+    """
+    Split an input line into tokens. Quotes group words and backslashes
+    escape characters, as in a POSIX shell, except for apostrophes inside a
+    word. A line whose quotes do not pair up is split on whitespace.
+    """
+    if _QUOTING.search(text) is None:
+        # Nothing to unquote, which is most input
+        return text.split()
+    try:
+        tokens = shlex.split(_ELISION.sub(_APOSTROPHE, text))
+    except ValueError:
+        return text.split()
+    return [token.replace(_APOSTROPHE, "'") for token in tokens]
+
+
+def parse_options(tokens, takes_value=None):
+    """
+    Split tokens into positional arguments and options in a single pass.
+    Options are `--name`, `-n`, `--name=value` or `-n=value`; a bare option
+    takes the following token as its value if `takes_value(name)` and that
+    token is not an option itself, otherwise it is a flag (`True`).
+    A repeated option keeps its last value and `--` ends the options.
+    :return: (args, kwargs)
+    """
+    args = []
+    kwargs = {}
+    i, n = 0, len(tokens)
+    while i < n:
+        token = tokens[i]
+        i += 1
+        if token == "--":
+            args.extend(tokens[i:])
+            break
+        if len(token) < 2 or token[0] != "-":
+            args.append(token)
+            continue
+
+        key = token[2:] if token[1] == "-" else token[1:]
+        if "=" in key:
+            key, value = key.split("=", 1)
+        elif (
+            i < n
+            and not tokens[i].startswith("-")
+            and (takes_value is None or takes_value(key))
+        ):
+            value = tokens[i]
+            i += 1
+        else:
+            value = True
+        kwargs[key] = value
+    return args, kwargs
+
 
 class Parameter:
     """
@@ -27,6 +108,23 @@ class Parameter:
         self.ailias = ailias  # Optional alias for the parameter
         self.positional = positional
 
+    def convert(self, value):
+        """Convert a raw value to the datatype of the parameter."""
+        if self.datatype is None:
+            return value
+        try:
+            return self.datatype(value)
+        except ValueError:
+            kind = "positional parameter" if self.positional else "parameter"
+            raise ValueError(
+                f"Invalid value for {kind} '{self.name}': "
+                f"expected {self.datatype.__name__}, got {value}"
+            )
+
+    def takes_value(self):
+        """Flags are set by their name alone, other options take a value."""
+        return self.datatype not in (None, bool)
+
     def __repr__(self):
         ailias_str = f"alias: -{self.ailias}, " if self.ailias else ""
         type_name = "type: " + (self.datatype.__name__ if self.datatype else "flag")
@@ -40,18 +138,21 @@ class Command:
     Represents a command with a callable, parameter hints, and a description.
     """
 
-    def __init__(self, func, name=None, description="", params=None):
+    def __init__(self, func, name=None, description="", params=None, pattern=None):
         """
         :param func: The function to execute.
         :param name: Optional command name (defaults to func.__name__).
         :param description: Description of the command.
         :param params: List of Parameter instances.
+        :param pattern: Optional regex, the command also runs for every input
+            name it fully matches.
         """
         if not callable(func):
             raise ValueError("func must be callable")
         self.func = func
         self.name = name or func.__name__
         self.description = description
+        self.pattern = pattern
         # If params are provided, use them; otherwise, infer from function signature
         if params is not None:
             self.params = params
@@ -101,56 +202,60 @@ class Command:
             raise ValueError("Duplicate parameter names found in command parameters.")
         if len(param_aliases) != len([p for p in self.params if p.ailias]):
             raise ValueError("Duplicate parameter aliases found in command parameters.")
+        self._bind_params()
+
+    def _bind_params(self):
+        """Precompute the lookups used on every call."""
+        self._by_key = {}
+        for param in self.params:
+            self._by_key[param.name] = param
+            if param.ailias:
+                self._by_key[param.ailias] = param
+        self._positional = [p for p in self.params if p.positional]
+        self._required = [p for p in self.params if p.required and not p.positional]
+        self._options = sorted(
+            f"--{key}" if len(key) > 1 else f"-{key}" for key in self._by_key
+        )
+
+    def complete_option(self, prefix, limit=None):
+        """Option names (e.g. `--language`, `-l`) starting with `prefix`."""
+        return complete_prefix(self._options, prefix, limit)
+
+    def takes_value(self, key):
+        """Whether the option `key` consumes the token that follows it."""
+        param = self._by_key.get(key)
+        if param is None:
+            return key not in HELP_OPTIONS
+        return param.takes_value()
+
+    def parse(self, tokens):
+        """Split the tokens following the command name into (args, kwargs)."""
+        return parse_options(tokens, self.takes_value)
 
     def __call__(self, *args, **kwargs):
         if kwargs.get("h") or kwargs.get("help"):
             return self.help_statement()
 
-        # Validate parameters
-        position = 0
-        new_kwargs = {}
-        for param in self.params:
-            if (
-                param.required
-                and not param.positional
-                and param.name not in kwargs
-                and param.ailias not in kwargs
-            ):
+        # Unknown options and surplus arguments are ignored
+        values = {}
+        for key, value in kwargs.items():
+            param = self._by_key.get(key)
+            if param is not None:
+                values[param.name] = param.convert(value)
+        for param in self._required:
+            if param.name not in values:
                 raise ValueError(f"Missing required parameter: {param.name}")
-            if param.name in kwargs or param.ailias in kwargs:
-                if param.ailias and param.ailias in kwargs:
-                    value = kwargs[param.ailias]
-                else:
-                    value = kwargs[param.name]
 
-                # Try to convert the value to the specified datatype
-                try:
-                    new_kwargs[param.name] = param.datatype(value)
-                except ValueError:
-                    raise ValueError(
-                        f"Invalid value for parameter '{param.name}': "
-                        f"expected {param.datatype.__name__}, got {value}"
-                    )
-            # Handle positional parameters
-            if param.positional:
-                if position < len(args):
-                    value = args[position]
-                    if param.datatype:
-                        try:
-                            value = param.datatype(value)
-                        except ValueError:
-                            raise ValueError(
-                                f"Invalid value for positional parameter '{param.name}': "
-                                f"expected {param.datatype.__name__}, got {value}"
-                            )
-                    new_kwargs[param.name] = value
-                else:
-                    raise ValueError(
-                        f"Missing required positional parameter: {param.name}"
-                    )
-                position += 1
+        position = 0
+        for param in self._positional:
+            if param.name in values:
+                continue
+            if position >= len(args):
+                raise ValueError(f"Missing required positional parameter: {param.name}")
+            values[param.name] = param.convert(args[position])
+            position += 1
 
-        return self.func(**new_kwargs)
+        return self.func(**values)
 
     def help_statement(self):
         """
@@ -177,6 +282,10 @@ class Terminal(InputHandler):
     def __init__(self, commands=[], prompt="> "):
         super().__init__(prompt)
 
+        # Exact names first, then the compiled patterns in the order attached
+        self._patterns = []
+        # Sorted command names for completion
+        self._names = ["help"]
         self._commands = {
             "help": Command(
                 lambda: self.help_statement(),
@@ -188,70 +297,61 @@ class Terminal(InputHandler):
         for command in commands:
             self.attach_command(command)
 
-    def _parse_command(self, command):
-        command_split = command.split()
-        command = command_split[0] if command_split else None
-        args = []
-        kwargs = {}
-        for item in command_split[1:]:
-            if item.startswith("--") and "=" in item:
-                # Handle long options with '=' (e.g., --option=value)
-                key, value = item[2:].split("=", 1)
-                kwargs[key] = value
-            elif item.startswith("--"):
-                # Handle long options with space (e.g., --option value)
-                key = item[2:]
-                # Only add as kwarg if next item exists and is not a command
-                next_index = command_split.index(item) + 1
-                if next_index < len(command_split) and not command_split[
-                    next_index
-                ].startswith("-"):
-                    kwargs[key] = command_split[next_index]
-                else:
-                    kwargs[key] = True
-            elif item.startswith("-") and "=" in item:
-                # Handle short options with '=' (e.g., -o=value)
-                key, value = item[1:].split("=", 1)
-                kwargs[key] = value
-            elif item.startswith("-"):
-                # Handle short options with space (e.g., -o value)
-                key = item[1:]
-                next_index = command_split.index(item) + 1
-                if next_index < len(command_split) and not command_split[
-                    next_index
-                ].startswith("-"):
-                    kwargs[key] = command_split[next_index]
-                else:
-                    kwargs[key] = True
-            else:
-                args.append(item)
+    def _resolve(self, name):
+        """Find the command for an input name, `None` if there is none."""
+        command = self._commands.get(name)
+        if command is None:
+            for pattern, candidate in self._patterns:
+                if pattern.fullmatch(name):
+                    return candidate
+        return command
+
+    def complete(self, line, limit=None):
+        """
+        Complete the last token of `line`: the command name if it is the
+        first token, an option name of the command if it starts with '-'.
+        :return: List of completions, empty for any other argument.
+        """
+        tokens = line.split(" ")
+        prefix = tokens[-1]
+        if len(tokens) == 1:
+            return complete_prefix(self._names, prefix, limit)
+        command = self._resolve(tokens[0])
+        if command is None or not prefix.startswith("-"):
+            return []
+        return command.complete_option(prefix, limit)
 
-        return command, args, kwargs
+    def _parse_command(self, command):
+        tokens = tokenize(command)
+        if not tokens:
+            return None, [], {}
+        matched = self._resolve(tokens[0])
+        args, kwargs = (
+            matched.parse(tokens[1:]) if matched else parse_options(tokens[1:])
+        )
+        return tokens[0], args, kwargs
 
     def handle_input(self, input: str):
         """Default command handler if no specific command is found."""
         if input.strip() == "":
             return ("", True)
 
-        models.CommandHistory.objects.create(command=input)
-
-        command, args, kwargs = self._parse_command(input)
+        history.record(input)
 
-        if command not in self._commands:
+        tokens = tokenize(input)
+        command = tokens[0]
+        matched_command = self._resolve(command)
+        if matched_command is None:
             return ("Command not found.\n", True)
 
         try:
-            matched_command = None
-            for key in self._commands:
-                # Match the entire command string to the regex pattern of the key
-                if re.fullmatch(key, command):
-                    matched_command = self._commands[key]
-                    break
-            if matched_command is None:
-                return ("Command not found.\n", True)
+            args, kwargs = matched_command.parse(tokens[1:])
             result = matched_command(*args, **kwargs)
             if result == "" or result is None:
                 return ("", True)
+            if isinstance(result, Iterator):
+                # Long output, let the input context handler serve it in pages
+                return Pager(result), True
             return (result + "\n"), True
         except Exception as e:
             return (f"Error executing command '{command}': {str(e)}" + "\n"), True
@@ -262,12 +362,22 @@ class Terminal(InputHandler):
             raise ValueError("All commands must be instances of Command class.")
         if command.name in self._commands:
             logging.info(f"Command '{command.name}' is already attached")
+            self.detach_command(command.name)
         self._commands[command.name] = command
+        insort(self._names, command.name)
+        if command.pattern:
+            self._patterns.append((re.compile(command.pattern), command))
 
     def detach_command(self, name):
         """Detach a command from the terminal."""
         if name in self._commands:
             del self._commands[name]
+            self._names.remove(name)
+            self._patterns = [
+                (pattern, command)
+                for pattern, command in self._patterns
+                if command.name != name
+            ]
 
     def help_statement(self):
         """List all attached commands."""
@@ -275,28 +385,28 @@ class Terminal(InputHandler):
 
     def create_relation(
         self,
-        input_context_handler,
         child,
         command_name,
         command_description="",
         welcome_message="",
     ):
         """
-        Create a relation between two terminals with a command.
+        Create a relation between two terminals with a command. The commands
+        switch the terminals of the session they are run in.
         """
 
         def switch_terminals():
             """
             Switch to the child terminal.
             """
-            input_context_handler.push_handler(child)
+            current_context.get().push_handler(child)
             return welcome_message
 
         def exit_terminal():
             """
             Exit the child terminal and return to the parent terminal.
             """
-            if input_context_handler.pop_handler() is None:
+            if current_context.get().pop_handler() is None:
                 raise ValueError("No terminal to exit from")
 
         self.attach_command(
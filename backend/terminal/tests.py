@@ -1,3 +1,458 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError
+from asgiref.testing import ApplicationCommunicator
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+import words.models as models
+from terminal import history
+from terminal.models import CommandHistory
+from terminal.input_context_handler import InputContextHandler
+from terminal.sessions import SessionStore, terminal_sessions
+from terminal.pager import Pager
+from terminal.terminal import Command, Parameter, Terminal, parse_options, tokenize
+
+
+class PagerTestCase(TestCase):
+    def test_pages(self):
+        pager = Pager((f"line{i}" for i in range(5)), page_size=2)
+        self.assertEqual(pager.next_page(), ("line0\nline1\n", False))
+        self.assertEqual(pager.next_page(), ("line2\nline3\n", False))
+        self.assertEqual(pager.next_page(), ("line4\n", True))
+
+    def test_exact_multiple(self):
+        pager = Pager(iter(["a", "b"]), page_size=2)
+        self.assertEqual(pager.next_page(), ("a\nb\n", True))
+
+    def test_pulls_lazily(self):
+        pulled = []
+
+        def lines():
+            for i in range(100):
+                pulled.append(i)
+                yield i
+
+        Pager(lines(), page_size=10).next_page()
+        self.assertEqual(len(pulled), 11)
+
+
+class ParseTestCase(TestCase):
+    def setUp(self):
+        self.calls = []
+
+        def echo(word: str, language: str = "en", n: int = 1, verbose: bool = False):
+            self.calls.append((word, language, n, verbose))
+            return word
+
+        self.terminal = Terminal([Command(echo)])
+        self.terminal.attach_command(
+            Command(
+                lambda word: word,
+                name="say",
+                params=[Parameter("word", str, "", positional=True, ailias="w")],
+                pattern=r"(say)+",
+            )
+        )
+
+    def tearDown(self):
+        history.history_writer.discard()
+
+    def test_tokenize_quotes(self):
+        self.assertEqual(tokenize("add 'ice cream' -l \"en\""), ["add", "ice cream", "-l", "en"])
+        self.assertEqual(tokenize("add 'ice"), ["add", "'ice"])
+
+    def test_tokenize_apostrophes(self):
+        self.assertEqual(tokenize("add aujourd'hui -l fr"), ["add", "aujourd'hui", "-l", "fr"])
+        self.assertEqual(tokenize("add l'eau l'air"), ["add", "l'eau", "l'air"])
+        self.assertEqual(tokenize("add \"l'eau froide\" -l fr"), ["add", "l'eau froide", "-l", "fr"])
+        self.assertEqual(tokenize("say 'don't stop' now"), ["say", "don't stop", "now"])
+        self.assertEqual(tokenize("add rock 'n roll"), ["add", "rock", "'n", "roll"])
+
+    def test_parse_options(self):
+        self.assertEqual(
+            parse_options(["a", "--x", "1", "-y=2", "b", "--z"]),
+            (["a", "b"], {"x": "1", "y": "2", "z": True}),
+        )
+        self.assertEqual(parse_options(["--x", "1", "--x", "2"]), ([], {"x": "2"}))
+        self.assertEqual(parse_options(["--", "-1", "--x"]), (["-1", "--x"], {}))
+
+    def test_option_values_are_not_arguments(self):
+        self.terminal.handle_input("echo --language es dog --n 3")
+        self.assertEqual(self.calls, [("dog", "es", 3, False)])
+
+    def test_flags_do_not_take_values(self):
+        self.terminal.handle_input("echo --verbose dog")
+        self.assertEqual(self.calls, [("dog", "en", 1, True)])
+
+    def test_quoted_argument(self):
+        self.assertEqual(self.terminal.handle_input('say "good day"'), ("good day\n", True))
+        self.assertEqual(self.terminal.handle_input("say 'x"), ("'x\n", True))
+        self.assertEqual(self.terminal.handle_input("say l'eau"), ("l'eau\n", True))
+
+    def test_pattern_dispatch(self):
+        self.assertEqual(self.terminal.handle_input("saysay hi"), ("hi\n", True))
+        self.assertEqual(self.terminal.handle_input("s hi"), ("Command not found.\n", True))
+        self.terminal.detach_command("say")
+        self.assertEqual(self.terminal.handle_input("saysay hi"), ("Command not found.\n", True))
+
+    def test_alias(self):
+        self.assertEqual(self.terminal.handle_input("say -w hello"), ("hello\n", True))
+
+    def test_complete(self):
+        self.assertEqual(self.terminal.complete("e"), ["echo"])
+        self.assertEqual(self.terminal.complete(""), ["echo", "help", "say"])
+        self.assertEqual(self.terminal.complete("", limit=1), ["echo"])
+        self.assertEqual(self.terminal.complete("echo --l"), ["--language"])
+        self.assertEqual(self.terminal.complete("say -"), ["--word", "-w"])
+        self.assertEqual(self.terminal.complete("echo do"), [])
+        self.terminal.detach_command("say")
+        self.assertEqual(self.terminal.complete("s"), [])
+
+    def test_errors(self):
+        output, _ = self.terminal.handle_input("echo dog --n x")
+        self.assertIn("Invalid value for parameter 'n'", output)
+        output, _ = self.terminal.handle_input("echo")
+        self.assertIn("Missing required positional parameter: word", output)
+
+
+class PagedOutputTestCase(TestCase):
+    def setUp(self):
+        self.terminal = Terminal(
+            [
+                Command(lambda: (f"row{i}" for i in range(120)), name="rows"),
+                Command(lambda: "ok", name="ok"),
+            ],
+            prompt="$ ",
+        )
+        self.handler = InputContextHandler([self.terminal])
+
+    def tearDown(self):
+        history.history_writer.discard()
+
+    def test_more_continues_output(self):
+        output, handled = self.handler.handle_input("rows")
+        self.assertTrue(handled)
+        self.assertTrue(output.startswith("row0\n"))
+        self.assertIn("row49\n-- more", output)
+        self.assertNotIn("row50", output)
+
+        output, _ = self.handler.handle_input("more")
+        self.assertTrue(output.startswith("row50\n"))
+        output, _ = self.handler.handle_input("next")
+        self.assertTrue(output.startswith("row100\n"))
+        self.assertNotIn("-- more", output)
+        self.assertIsNone(self.handler.pager)
+
+    def test_other_input_abandons_output(self):
+        self.handler.handle_input("rows")
+        self.assertEqual(self.handler.handle_input("ok"), ("ok\n$ ", True))
+        self.assertIsNone(self.handler.pager)
+
+    def test_suggestions(self):
+        from words.fuzzy import fuzzy_index
+        from words.words import words_terminal
+
+        fuzzy_index.invalidate()
+        models.Word.objects.create(word="house", language="en")
+        self.handler.input_handlers = [words_terminal]
+        for command in ["remove hose -l en", "remove hose", "update hose home"]:
+            output, _ = self.handler.handle_input(command)
+            self.assertIn("Did you mean: house?", output)
+
+    def test_words_list_is_paged(self):
+        from words.words import words_terminal
+
+        for i in range(60):
+            models.Word.objects.create(word=f"w{i:02}", language="en")
+        self.handler.input_handlers = [words_terminal]
+
+        # The history write is buffered, only the first chunk is read
+        with self.assertNumQueries(1):
+            output, _ = self.handler.handle_input("list en")
+        self.assertTrue(output.startswith("w00 (en, 0)\n"))
+        output, _ = self.handler.handle_input("more")
+        self.assertTrue(output.startswith("w50 (en, 0)\n"))
+        self.assertTrue(output.endswith("w59 (en, 0)\nwords> "))
+
+
+class CommandHistoryTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(5):
+            history.record(f"cmd{i}")
+        history.flush()
+
+    def tearDown(self):
+        history.history_writer.discard()
+
+    def test_get_last_command(self):
+        self.assertEqual(CommandHistory.get_last_command(0)[0].command, "cmd4")
+        self.assertEqual(CommandHistory.get_last_command(3)[0].command, "cmd1")
+        command, i = CommandHistory.get_last_command(50)
+        self.assertEqual((command.command, i), ("cmd0", 4))
+
+    def test_one_query_per_lookup(self):
+        history.get_last_command(0)
+        with self.assertNumQueries(1):
+            history.get_last_command(2)
+
+    def test_record_is_buffered(self):
+        with self.assertNumQueries(0):
+            history.record("cmd5")
+            history.record("cmd6")
+        self.assertEqual(len(history.history_writer), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(history.flush(), 2)
+        self.assertEqual(CommandHistory.objects.count(), 7)
+
+    def test_lookup_flushes_first(self):
+        history.record("cmd5")
+        command, i = history.get_last_command(0)
+        self.assertEqual((command.command, i), ("cmd5", 0))
+
+    def test_timestamp_of_entry(self):
+        before = timezone.now()
+        history.record("cmd5")
+        history.flush()
+        self.assertGreaterEqual(CommandHistory.objects.get(command="cmd5").timestamp, before)
+
+    @override_settings(TERMINAL_HISTORY_FLUSH_SIZE=2, TERMINAL_HISTORY_FLUSH_INTERVAL=60)
+    def test_flush_after_request(self):
+        self.client.get("/api/status/")
+        self.assertEqual(len(history.history_writer), 0)
+        history.record("cmd5")
+        self.client.get("/api/status/")
+        self.assertEqual(len(history.history_writer), 1)
+        history.record("cmd6")
+        self.client.get("/api/status/")
+        self.assertEqual(len(history.history_writer), 0)
+        self.assertEqual(CommandHistory.objects.count(), 7)
+
+    @override_settings(TERMINAL_HISTORY_FLUSH_SIZE=50, TERMINAL_HISTORY_FLUSH_INTERVAL=0)
+    def test_flush_after_interval(self):
+        history.record("cmd5")
+        self.client.get("/api/status/")
+        self.assertEqual(len(history.history_writer), 0)
+
+    @override_settings(TERMINAL_HISTORY_BUFFER_SIZE=2, TERMINAL_HISTORY_OVERFLOW="flush")
+    def test_overflow_flush(self):
+        for i in range(2):
+            history.record(f"extra{i}")
+        self.assertEqual(CommandHistory.objects.count(), 5)
+        history.record("extra2")
+        self.assertEqual(len(history.history_writer), 0)
+        self.assertEqual(CommandHistory.objects.count(), 8)
+
+    @override_settings(TERMINAL_HISTORY_FLUSH_SIZE=1)
+    def test_failed_flush_keeps_commands(self):
+        history.record("cmd5")
+        history.record("cmd6")
+        error = OperationalError("database is locked")
+        with mock.patch.object(CommandHistory.objects, "bulk_create", side_effect=error):
+            with self.assertRaises(OperationalError):
+                history.flush()
+            self.assertEqual(len(history.history_writer), 2)
+            # After a request the error is logged, not raised
+            with self.assertLogs("terminal.signals", "ERROR"):
+                self.client.get("/api/status/")
+        history.record("cmd7")
+        self.assertEqual(history.flush(), 3)
+        self.assertEqual(CommandHistory.get_last_command(0)[0].command, "cmd7")
+        self.assertEqual(CommandHistory.get_last_command(2)[0].command, "cmd5")
+
+    @override_settings(TERMINAL_HISTORY_BUFFER_SIZE=2, TERMINAL_HISTORY_OVERFLOW="drop")
+    def test_overflow_drop(self):
+        dropped = history.history_writer.dropped
+        with self.assertNumQueries(0):
+            for i in range(3):
+                history.record(f"extra{i}")
+        self.assertEqual(history.history_writer.dropped, dropped + 1)
+        history.flush()
+        self.assertFalse(CommandHistory.objects.filter(command="extra0").exists())
+        self.assertTrue(CommandHistory.objects.filter(command="extra2").exists())
+
+    def test_same_timestamp_falls_back_to_id(self):
+        stamp = timezone.now()
+        CommandHistory.objects.update(timestamp=stamp)
+        self.assertEqual(history.get_last_command(0)[0].command, "cmd4")
+
+    def test_stale_count(self):
+        history.get_last_command(0)
+        CommandHistory.objects.filter(command__in=["cmd0", "cmd1"]).delete()
+        command, i = history.get_last_command(4)
+        self.assertEqual((command.command, i), ("cmd2", 2))
+
+    def test_empty(self):
+        CommandHistory.objects.all().delete()
+        history.history_counter.invalidate()
+        self.assertEqual(history.get_last_command(0), (None, -1))
+
+    def test_prune_max_rows(self):
+        self.assertEqual(history.prune(max_rows=2), 3)
+        self.assertEqual(
+            list(CommandHistory.objects.values_list("command", flat=True)),
+            ["cmd3", "cmd4"],
+        )
+        self.assertEqual(history.get_last_command(10)[1], 1)
+
+    def test_prune_max_age(self):
+        CommandHistory.objects.filter(command="cmd0").update(
+            timestamp=timezone.now() - timedelta(days=30)
+        )
+        self.assertEqual(history.prune(max_age=timedelta(days=7)), 1)
+        self.assertEqual(history.prune(max_age=timedelta(days=7)), 0)
+
+    @override_settings(TERMINAL_HISTORY_MAX_ROWS=3, TERMINAL_HISTORY_PRUNE_EVERY=2)
+    def test_periodic_prune(self):
+        history.record("cmd5")
+        history.flush()
+        self.assertEqual(CommandHistory.objects.count(), 6)
+        history.record("cmd6")
+        history.flush()
+        self.assertEqual(CommandHistory.objects.count(), 3)
+
+    def test_prune_command(self):
+        call_command("prune_history", "--max-rows=1", stdout=StringIO())
+        self.assertEqual(CommandHistory.objects.get().command, "cmd4")
+
+
+class WebSocketTestCase(SimpleTestCase):
+    def setUp(self):
+        from terminal.websocket import terminal_websocket
+
+        self.app = terminal_websocket
+        terminal = Terminal(
+            [
+                Command(lambda: (f"row{i}" for i in range(120)), name="rows"),
+                Command(lambda: "ok", name="ok"),
+            ],
+            prompt="$ ",
+        )
+        self.saved = terminal_sessions._factory
+        terminal_sessions._factory = lambda: InputContextHandler([terminal])
+
+    def tearDown(self):
+        terminal_sessions._factory = self.saved
+        history.history_writer.discard()
+
+    def communicator(self, headers=()):
+        scope = {"type": "websocket", "path": "/ws/terminal/", "headers": list(headers)}
+        return ApplicationCommunicator(self.app, scope)
+
+    async def receive_frame(self, communicator):
+        message = await communicator.receive_output(timeout=5)
+        return json.loads(message["text"])
+
+    async def test_session(self):
+        communicator = self.communicator()
+        await communicator.send_input({"type": "websocket.connect"})
+        self.assertEqual((await communicator.receive_output())["type"], "websocket.accept")
+        sessions = len(terminal_sessions)
+        self.assertEqual(await self.receive_frame(communicator), {"type": "prompt", "data": "$ "})
+
+        await communicator.send_input({"type": "websocket.receive", "text": "ok"})
+        self.assertEqual(await self.receive_frame(communicator), {"type": "output", "data": "ok\n"})
+        self.assertEqual((await self.receive_frame(communicator))["type"], "prompt")
+
+        # Long output is streamed a page per frame without waiting for 'more'
+        await communicator.send_input({"type": "websocket.receive", "text": "rows"})
+        pages = []
+        while (frame := await self.receive_frame(communicator))["type"] == "output":
+            pages.append(frame["data"])
+        self.assertEqual(len(pages), 3)
+        self.assertTrue(pages[-1].endswith("row119\n"))
+
+        self.assertEqual(len(terminal_sessions), sessions)
+        await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+        await communicator.wait(timeout=5)
+        self.assertEqual(len(terminal_sessions), sessions - 1)
+
+    @override_settings(CORS_ALLOW_ALL_ORIGINS=False)
+    async def test_rejects_unknown_origin(self):
+        communicator = self.communicator([(b"origin", b"https://evil.example")])
+        await communicator.send_input({"type": "websocket.connect"})
+        self.assertEqual((await communicator.receive_output())["type"], "websocket.close")
+
+
+class SessionStoreTestCase(SimpleTestCase):
+    def setUp(self):
+        self.terminal = Terminal([], prompt="$ ")
+        self.child = Terminal([Command(lambda: "hi", name="hi")], prompt="child> ")
+        self.terminal.create_relation(self.child, "child")
+        self.store = SessionStore(lambda: InputContextHandler([self.terminal]))
+
+    def tearDown(self):
+        history.history_writer.discard()
+
+    def test_sessions_have_their_own_stack(self):
+        a, b = self.store.get("a"), self.store.get("b")
+        self.assertEqual(a.handle_input("child"), ("child> ", True))
+        self.assertEqual(a.handle_input("hi"), ("hi\nchild> ", True))
+        self.assertEqual(b.handle_input("hi"), ("Command not found.\n$ ", True))
+        self.assertIs(self.store.get("a"), a)
+        self.assertEqual(a.handle_input("exit"), ("$ ", True))
+
+    @override_settings(TERMINAL_SESSIONS_MAX=2)
+    def test_least_recently_used_is_evicted(self):
+        self.store.get("a")
+        self.store.get("b")
+        self.store.get("a")
+        self.store.get("c")
+        self.assertIn("a", self.store)
+        self.assertNotIn("b", self.store)
+        self.assertIsNone(self.store.get("b", create=False))
+        self.assertEqual(self.store.evicted, 1)
+
+    @override_settings(TERMINAL_SESSION_IDLE_TIMEOUT=0)
+    def test_idle_sessions_are_evicted(self):
+        self.store.get("a")
+        self.store.get("b")
+        self.assertEqual(len(self.store), 1)
+
+    def test_memory_is_capped(self):
+        size = self.store.get("a").memory_size()
+        with self.settings(TERMINAL_SESSIONS_MAX_BYTES=size * 2):
+            for key in "bcd":
+                self.store.get(key)
+        self.assertEqual(len(self.store), 2)
+        self.assertLessEqual(self.store.stats()["bytes"], size * 2)
+
+    def test_pending_output_counts_towards_the_cap(self):
+        size = self.store.get("a").memory_size()
+        self.store.get("b")
+        pager = Pager(f"line {i}" for i in range(1000))
+        pager.next_page()
+        self.store.get("a").pager = pager
+        with self.settings(TERMINAL_SESSIONS_MAX_BYTES=size * 2 + 1):
+            # "a" is measured again on its next lookup and then evicted
+            self.store.get("b")
+            self.assertIn("b", self.store)
+            self.assertEqual(len(self.store), 2)
+            self.store.get("a")
+        self.assertNotIn("b", self.store)
+        self.assertEqual(self.store.stats()["bytes"], self.store.get("a").memory_size())
+
+    @override_settings(TERMINAL_SESSION_MAX_DEPTH=1)
+    def test_depth_is_capped(self):
+        output, _ = self.store.get("a").handle_input("child")
+        self.assertIn("Too many nested terminals", output)
+
+    def test_thread_safe(self):
+        import threading
+
+        def worker(i):
+            for j in range(200):
+                self.store.get(f"{i}:{j % 20}").handle_input("help")
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.store), 160)
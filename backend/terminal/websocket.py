@@ -0,0 +1,103 @@
+import asyncio
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from terminal.sessions import terminal_sessions
+from terminal.signals import flush_history
+
+_executor = None
+_executor_lock = threading.Lock()
+_DONE = object()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.TERMINAL_WS_WORKERS,
+                thread_name_prefix="terminal-ws",
+            )
+    return _executor
+
+
+def _call(func, *args):
+    # Worker threads outlive requests, so recycle their connections the way
+    # the request cycle would
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_in_worker(func, *args):
+    """Run a blocking (e.g. ORM) call in the terminal thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), _call, func, *args)
+
+
+def origin_allowed(scope):
+    """Browsers send an Origin header, accept the same origins as CORS does."""
+    origin = dict(scope.get("headers", [])).get(b"origin")
+    if origin is None or settings.CORS_ALLOW_ALL_ORIGINS:
+        return True
+    return origin.decode("latin1") in settings.CORS_ALLOWED_ORIGINS
+
+
+async def send_frame(send, kind, data):
+    await send({"type": "websocket.send", "text": json.dumps({"type": kind, "data": data})})
+
+
+async def terminal_websocket(scope, receive, send):
+    """
+    ASGI app serving the terminal over a WebSocket.
+
+    Every text frame the client sends is one input line. The reply is one or
+    more `{"type": "output" | "error", "data": text}` frames, long output
+    streamed a page per frame, always ending with a
+    `{"type": "prompt", "data": prompt}` frame. A prompt frame is also sent
+    right after connecting.
+    """
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    if not origin_allowed(scope):
+        # Closing before accepting rejects the handshake with a 403
+        await send({"type": "websocket.close", "code": 4003})
+        return
+    await send({"type": "websocket.accept"})
+
+    # Every connection is a session of its own
+    session_id = f"ws:{uuid.uuid4()}"
+    handler = terminal_sessions.get(session_id)
+    await send_frame(send, "prompt", handler.get_handlers()[-1].prompt)
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message["type"] != "websocket.receive":
+                continue
+            line = message.get("text")
+            if line is None:
+                line = (message.get("bytes") or b"").decode("utf-8", "replace")
+
+            # Keeps the session from idling out while it is connected
+            handler = terminal_sessions.get(session_id)
+            chunks = handler.stream_input(line)
+            while True:
+                item = await run_in_worker(next, chunks, _DONE)
+                if item is _DONE:
+                    break
+                await send_frame(send, *item)
+            # The reply is out, the history write no longer delays it
+            await run_in_worker(flush_history, None)
+    finally:
+        terminal_sessions.drop(session_id)
+        await run_in_worker(flush_history, None)
@@ -2,6 +2,8 @@
 ASGI config for thyme_server project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Besides the Django app it serves the terminal WebSocket at
+``settings.TERMINAL_WS_PATH``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -9,8 +11,18 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'thyme_server.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Needs the app registry, which get_asgi_application has set up
+from terminal.websocket import terminal_websocket  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket" and scope["path"] == settings.TERMINAL_WS_PATH:
+        return await terminal_websocket(scope, receive, send)
+    return await django_application(scope, receive, send)
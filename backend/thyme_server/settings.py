@@ -100,11 +100,98 @@ WSGI_APPLICATION = "thyme_server.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        # Django's SQLite backend, tuned by the SQLITE_* settings below
+        "ENGINE": "thyme_server.sqlite",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Seconds to keep a connection open between requests, 0 closes it
+        # after every request. Only raise it under WSGI: under ASGI every sync
+        # view may run on a new thread with its own connection, and those
+        # persistent connections are never reused nor closed
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 0)),
     }
 }
 
+# SQLite pragmas set on every new connection (see thyme_server.sqlite), an
+# empty value keeps SQLite's default. WAL lets readers run alongside the
+# writer, and "normal" synchronous only syncs at checkpoints in WAL mode.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "wal"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "normal"),
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(64 * 2**20)),
+    # Negative values are in KiB
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-16000"),
+    # Milliseconds a connection waits for a lock before "database is locked"
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT", "5000"),
+}
+# How transaction.atomic() begins, "immediate" takes the write lock up front
+# so that read-then-write transactions wait for it instead of failing
+SQLITE_TRANSACTION_MODE = os.getenv("SQLITE_TRANSACTION_MODE", "immediate")
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Holds the per-language data versions (words.versions), which also tell the
+# in-process sampler tables and fuzzy indexes when to rebuild, and the
+# read-through cache of word lookups (words.caching). The default locmem backend is only
+# coherent with a single worker process; when running several gunicorn or
+# uvicorn workers use "file" or "redis" so they all see the same versions.
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": os.getenv(
+            "CACHE_LOCATION",
+            {
+                "locmem": "thyme",
+                "file": os.path.join(BASE_DIR, "cache"),
+                "redis": "redis://127.0.0.1:6379",
+            }[CACHE_BACKEND],
+        ),
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", 300)),
+    }
+}
+
+
+# Word sampling
+# "stored" draws words by the persisted Word.p, "lazy" computes the weight at
+# draw time from strength and last_seen (see words.sampler).
+WORDS_SAMPLING_MODE = os.getenv("WORDS_SAMPLING_MODE", "stored")
+# Recency term used by the "lazy" mode, one of words.probability.RECENCY_TERMS
+WORDS_RECENCY = os.getenv("WORDS_RECENCY", "linear")
+WORDS_RECENCY_SCALE = float(os.getenv("WORDS_RECENCY_SCALE", 86400))
+
+
+# Terminal command history retention (see terminal.history)
+TERMINAL_HISTORY_MAX_ROWS = int(os.getenv("TERMINAL_HISTORY_MAX_ROWS", 10000))
+TERMINAL_HISTORY_MAX_AGE_DAYS = int(os.getenv("TERMINAL_HISTORY_MAX_AGE_DAYS", 365))
+# Prune after every this many recorded commands, 0 disables the periodic prune
+TERMINAL_HISTORY_PRUNE_EVERY = int(os.getenv("TERMINAL_HISTORY_PRUNE_EVERY", 100))
+# Commands are buffered in memory and written in batches (see HistoryWriter)
+TERMINAL_HISTORY_FLUSH_SIZE = int(os.getenv("TERMINAL_HISTORY_FLUSH_SIZE", 50))
+TERMINAL_HISTORY_FLUSH_INTERVAL = float(os.getenv("TERMINAL_HISTORY_FLUSH_INTERVAL", 2))
+TERMINAL_HISTORY_BUFFER_SIZE = int(os.getenv("TERMINAL_HISTORY_BUFFER_SIZE", 1000))
+# What to do with a full buffer, "flush" it right away or "drop" the oldest
+TERMINAL_HISTORY_OVERFLOW = os.getenv("TERMINAL_HISTORY_OVERFLOW", "flush")
+
+# Terminal sessions (handler stacks) kept in memory, see terminal.sessions. The
+# byte limit is approximate, sessions are measured shallowly on every lookup
+TERMINAL_SESSIONS_MAX = int(os.getenv("TERMINAL_SESSIONS_MAX", 1000))
+TERMINAL_SESSIONS_MAX_BYTES = int(os.getenv("TERMINAL_SESSIONS_MAX_BYTES", 16 * 2**20))
+TERMINAL_SESSION_IDLE_TIMEOUT = float(os.getenv("TERMINAL_SESSION_IDLE_TIMEOUT", 1800))
+TERMINAL_SESSION_MAX_DEPTH = int(os.getenv("TERMINAL_SESSION_MAX_DEPTH", 16))
+
+# Terminal WebSocket served by thyme_server.asgi (see terminal.websocket)
+TERMINAL_WS_PATH = os.getenv("TERMINAL_WS_PATH", "/ws/terminal/")
+# Threads running the blocking terminal commands of all WebSocket connections
+TERMINAL_WS_WORKERS = int(os.getenv("TERMINAL_WS_WORKERS", 8))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -0,0 +1,43 @@
+"""
+SQLite tuning. `ENGINE: "thyme_server.sqlite"` is Django's SQLite backend
+with a configurable transaction mode (see `base.DatabaseWrapper`), and every
+new connection gets `settings.SQLITE_PRAGMAS` from the hook below.
+"""
+
+import re
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRAGMAS = {"journal_mode", "synchronous", "mmap_size", "cache_size", "busy_timeout"}
+# Values are interpolated into the statement, only allow keywords and integers
+_VALUE = re.compile(r"-?\d+|[A-Za-z]+")
+
+
+def pragma_statements(pragmas):
+    """
+    `PRAGMA` statements setting `pragmas` ({name: value}), skipping the
+    empty values.
+    :raises ValueError: For an unknown pragma or a malformed value.
+    """
+    statements = []
+    for name, value in pragmas.items():
+        if value is None or value == "":
+            continue
+        if name not in PRAGMAS:
+            raise ValueError(f"Unsupported SQLite pragma '{name}'.")
+        if not _VALUE.fullmatch(str(value)):
+            raise ValueError(f"Invalid value {value!r} for SQLite pragma '{name}'.")
+        statements.append(f"PRAGMA {name} = {value}")
+    return statements
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Apply `settings.SQLITE_PRAGMAS` to every new SQLite connection."""
+    if connection.vendor != "sqlite":
+        return
+    # Straight on the driver connection, so they are not logged as queries
+    for statement in pragma_statements(settings.SQLITE_PRAGMAS):
+        connection.connection.execute(statement)
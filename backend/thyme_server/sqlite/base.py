@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+# Importing the backend connects the pragma hook
+from thyme_server.sqlite import configure_sqlite  # noqa: F401
+
+TRANSACTION_MODES = {"deferred", "immediate", "exclusive"}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Django's SQLite backend, opening transactions with
+    `BEGIN <settings.SQLITE_TRANSACTION_MODE>`.
+
+    A deferred transaction that reads before it writes has to upgrade its
+    lock halfway, and SQLite fails that upgrade with "database is locked"
+    right away instead of waiting `busy_timeout` when another connection is
+    writing. An immediate transaction takes the write lock (and waits for
+    it) at BEGIN.
+    """
+
+    def _start_transaction_under_autocommit(self):
+        mode = settings.SQLITE_TRANSACTION_MODE.lower()
+        if mode not in TRANSACTION_MODES:
+            raise ValueError(
+                f"Invalid SQLite transaction mode '{mode}'. "
+                f"Must be one of {sorted(TRANSACTION_MODES)}."
+            )
+        self.cursor().execute(f"BEGIN {mode.upper()}")
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from words import versions
+
+_MISSING = object()
+
+
+class CacheStats:
+    """Hit/miss counters of the read-through cache, per process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+cache_stats = CacheStats()
+
+
+def make_key(kind, language, params, version=None):
+    """
+    Cache key for a result about `language`. The key embeds the language's
+    data version, so bumping the version (on every Word or synonym write, see
+    words.signals) invalidates every entry of that language at once, in every
+    worker that shares the cache backend.
+    :param version: The data version to use, the current one by default.
+    """
+    if version is None:
+        version = versions.get_version(language)
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f"words:{kind}:{language or versions.ALL_LANGUAGES}:{version}:{digest}"
+
+
+def _store(key, language, version, value, timeout):
+    # A write that committed while `value` was being computed may not be in
+    # it, keep it out of the cache rather than under the old version's key
+    if versions.get_version(language) != version:
+        return
+    if timeout is None:
+        cache.set(key, value)
+    else:
+        cache.set(key, value, timeout)
+
+
+def _lookup(kind, language, params):
+    version = versions.get_version(language)
+    key = make_key(kind, language, params, version)
+    return version, key, cache.get(key, _MISSING)
+
+
+async def run_cache(func, *args):
+    """
+    Call `func`, which uses the cache, from async code. An in-memory cache is
+    called right away: in Django 4.2 the async cache methods only run the same
+    calls in a worker thread, which costs more than the lookup. Any other
+    backend does I/O and must not block the event loop.
+    """
+    if settings.CACHES["default"]["BACKEND"].endswith(".LocMemCache"):
+        return func(*args)
+    return await sync_to_async(func)(*args)
+
+
+def get_or_compute(kind, language, params, compute, timeout=None):
+    """
+    Read-through lookup: return the cached result for (kind, language,
+    params) or compute, store and return it.
+    :param compute: Called without arguments on a miss, must return something picklable.
+    :param timeout: Seconds to keep the entry, defaults to the backend's timeout.
+    """
+    version, key, value = _lookup(kind, language, params)
+    if value is not _MISSING:
+        cache_stats.record(hit=True)
+        return value
+
+    cache_stats.record(hit=False)
+    value = compute()
+    _store(key, language, version, value, timeout)
+    return value
+
+
+async def aget_or_compute(kind, language, params, acompute, timeout=None):
+    """
+    `get_or_compute` for async views, `acompute` being a coroutine function.
+    The cache is called through `run_cache`.
+    """
+    version, key, value = await run_cache(_lookup, kind, language, params)
+    if value is not _MISSING:
+        cache_stats.record(hit=True)
+        return value
+
+    cache_stats.record(hit=False)
+    value = await acompute()
+    await run_cache(_store, key, language, version, value, timeout)
+    return value
@@ -1,8 +1,23 @@
+import base64
+import json
+from itertools import groupby
+from asgiref.sync import sync_to_async
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 import words.models as models
-from django.db.models import Max, F
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models.deletion import Collector
+from django.db.models import DateTimeField, F, Max, Prefetch, Q, Value
+from django.db.models.functions import Greatest, Least
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 import numpy as np
+from words.probability import sigmoid, compute_probability
+from words import scheduler
+from words.sampler import word_sampler
+from words import caching
+from words.fuzzy import fuzzy_index
+from words.signals import words_changed, words_reviewed
 
 
 def assert_valid_language(language: str):
@@ -13,6 +28,25 @@ def assert_valid_language(language: str):
         )
 
 
+class WordNotFound(ValueError):
+    """A word does not exist, `suggestions` holds the closest existing words."""
+
+    def __init__(self, message, suggestions=()):
+        self.suggestions = list(suggestions)
+        if self.suggestions:
+            message += f" Did you mean: {', '.join(self.suggestions)}?"
+        super().__init__(message)
+
+
+def word_not_found(word, language=None):
+    """Build the `WordNotFound` error for `word`, with suggestions."""
+    if language:
+        message = f"Word '{word}' in language '{language}' does not exist."
+    else:
+        message = f"Word '{word}' does not exist."
+    return WordNotFound(message, fuzzy_index.suggest(word, language))
+
+
 def update_or_create_word(word, language, strength=0, last_seen=None):
     """Update or create a word in the database."""
     assert_valid_language(language)
@@ -31,25 +65,34 @@ def update_or_create_word(word, language, strength=0, last_seen=None):
     return word, created
 
 
-def get_word(word, language=None):
+def with_synonyms(query):
+    """Prefetch the synonyms `WordSerializer` needs with one extra query."""
+    return query.prefetch_related(
+        Prefetch("synonyms", queryset=models.Word.objects.only("word", "language"))
+    )
+
+
+def get_word(word, language=None, prefetch_synonyms=True):
     query = models.Word.objects.filter(word=word)
     if language:
         assert_valid_language(language)
         query = query.filter(language=language)
 
-    if query.count() > 1:
+    # Two rows are enough to tell a unique match from an ambiguous one
+    if prefetch_synonyms:
+        query = with_synonyms(query)
+    matches = list(query[:2])
+    if len(matches) > 1:
         raise LookupError("Multiple words found, please specify a language.")
-    elif query.count() == 0 and language == None:
-        raise ValueError(f"Word '{word}' does not exist.")
-    elif query.count() == 0:
-        raise ValueError(f"Word '{word}' in language '{language}' does not exist.")
+    elif not matches:
+        raise word_not_found(word, language)
     else:
-        return query.first()
+        return matches[0]
 
 
 def remove_word(word, language=None):
     """Remove a word from the database."""
-    word = get_word(word, language)
+    word = get_word(word, language, prefetch_synonyms=False)
     word.delete()
 
 
@@ -68,8 +111,89 @@ def create_synonym(word: models.Word, synonym: models.Word):
     word.synonyms.add(synonym)
 
 
-def sigmoid(x, a, b):
-    return 1 / (1 + pow(a, x - b))
+def _bulk_create_resolved(objs, lookup):
+    """
+    `bulk_create` the words `objs` and return them keyed by (word, language).
+    Backends that cannot return the new pks from the insert get the words
+    matching `lookup` (which must cover `objs`) instead.
+    """
+    models.Word.objects.bulk_create(objs)
+    if any(obj.pk is None for obj in objs):
+        objs = models.Word.objects.filter(lookup).order_by()
+    return {(obj.word, obj.language): obj for obj in objs}
+
+
+def import_words(rows, language, translation_language):
+    """
+    Set-based import of words and their translations, used by `upload_csv`.
+    Existing words are resolved with a single query, missing ones are
+    created with `bulk_create` and the synonym links are inserted straight
+    into the through table, all inside one transaction.
+    Args:
+        rows (list[tuple]): (word, translations, last_seen, strength) tuples,
+            `translations` being a list of words in `translation_language`.
+        language (str): The language of the words.
+        translation_language (str): The language of the translations.
+    Returns:
+        (int, int): Number of words created and of synonym links written.
+    """
+    assert_valid_language(language)
+    assert_valid_language(translation_language)
+
+    # Later rows win, just like calling update_or_create_word row by row
+    main = {}
+    translations = {}
+    for word, trans_words, last_seen, strength in rows:
+        main[word] = (strength, last_seen)
+        translations.setdefault(word, set()).update(trans_words)
+    trans_keys = {
+        (t, translation_language) for ts in translations.values() for t in ts
+    } - {(w, language) for w in main}
+    lookup = Q(language=language, word__in=main) | Q(
+        language=translation_language, word__in={t for t, _ in trans_keys}
+    )
+
+    with transaction.atomic():
+        resolved = {
+            (w.word, w.language): w
+            for w in models.Word.objects.filter(lookup).order_by()
+        }
+
+        to_update = []
+        to_create = []
+        for word, (strength, last_seen) in main.items():
+            obj = resolved.get((word, language))
+            if obj is None:
+                obj = models.Word(word=word, language=language)
+                to_create.append(obj)
+            else:
+                to_update.append(obj)
+            obj.strength = strength
+            if last_seen:
+                obj.last_seen = last_seen
+        # Translations are only created, an existing word keeps its strength
+        for key in trans_keys - set(resolved):
+            to_create.append(models.Word(word=key[0], language=key[1]))
+
+        models.Word.objects.bulk_update(to_update, fields=["strength", "last_seen"])
+        resolved = {**_bulk_create_resolved(to_create, lookup), **resolved}
+
+        # Synonyms are symmetrical, link both directions like `synonyms.add`
+        links = set()
+        for word, trans_words in translations.items():
+            from_pk = resolved[(word, language)].pk
+            for t in trans_words:
+                to_pk = resolved[(t, translation_language)].pk
+                if from_pk != to_pk:
+                    links.update([(from_pk, to_pk), (to_pk, from_pk)])
+        Through = models.Word.synonyms.through
+        Through.objects.bulk_create(
+            [Through(from_word_id=f, to_word_id=t) for f, t in links],
+            ignore_conflicts=True,
+        )
+
+    words_changed({language, translation_language})
+    return len(to_create), len(links) // 2
 
 
 def dec_strength(word: models.Word, ammount=1):
@@ -84,44 +208,262 @@ def inc_strength(word: models.Word, ammount=1):
         word.save()
 
 
-def set_probability(word: models.Word):
-    # Show weaker words first
-    p = 1.0
-    p *= sigmoid(word.strength, 1000, 0.5)
+def review_word(word: models.Word, correct: bool, seen_at=None):
+    """
+    Record a review of `word`: adjust its strength, mark it as seen and
+    schedule its next review. Only this word's row is written. In the "lazy"
+    sampling mode that is all that is needed, in the "stored" mode its `p` is
+    refreshed as well.
+    """
+    if correct and word.strength < 5:
+        word.strength += 1
+    elif not correct and word.strength > 0:
+        word.strength -= 1
+    word.last_seen = seen_at or timezone.now()
+    scheduler.schedule(word, scheduler.quality_from_correct(correct), word.last_seen)
+
+    if settings.WORDS_SAMPLING_MODE == "stored":
+        set_probability(word)
+    else:
+        word.save(
+            update_fields=["strength", "last_seen", "interval", "ease", "due_at"]
+        )
+
 
-    # Adjust probability based on the time since the word was last seen
+def set_probability(word: models.Word):
     elapsed_time = timezone.now() - word.last_seen
-    elapsed_time = elapsed_time.total_seconds()
     max_last_seen = models.Word.objects.filter(language=word.language).aggregate(
         Max("last_seen")
     )["last_seen__max"]
-    if max_last_seen and hasattr(max_last_seen, "second") and max_last_seen.second != 0:
-        elapsed_time /= max_last_seen.second
-    p *= elapsed_time
 
-    word.p = p
+    word.p = float(
+        compute_probability(word.strength, elapsed_time.total_seconds(), max_last_seen)
+    )
     word.save()
 
 
+def recompute_probabilities(language=None, chunk_size=500, pks=None):
+    """
+    Recompute `p` for every word (of a language) in one vectorized pass.
+    Gives the same result as calling `set_probability` on each word, but reads
+    the table once and writes it back with chunked `bulk_update`s inside a
+    single transaction.
+    :param pks: Only recompute these words.
+    :return: Number of words updated.
+    """
+    query = models.Word.objects.order_by()
+    if language:
+        assert_valid_language(language)
+        query = query.filter(language=language)
+    if pks is not None:
+        query = query.filter(pk__in=pks)
+
+    rows = list(query.values_list("pk", "language", "strength", "last_seen"))
+    if not rows:
+        return 0
+
+    word_pks = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    languages = np.array([r[1] for r in rows])
+    strength = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+    last_seen = np.fromiter(
+        (r[3].timestamp() for r in rows), dtype=np.float64, count=len(rows)
+    )
+    elapsed = timezone.now().timestamp() - last_seen
+
+    if pks is not None:
+        # The most recent last_seen is per language, not per selection
+        max_last_seen_by_language = dict(
+            models.Word.objects.filter(language__in=np.unique(languages).tolist())
+            .order_by()
+            .values("language")
+            .annotate(max_last_seen=Max("last_seen"))
+            .values_list("language", "max_last_seen")
+        )
+
+    p = np.empty(len(rows), dtype=np.float64)
+    for lang in np.unique(languages):
+        mask = languages == lang
+        if pks is not None:
+            max_last_seen = max_last_seen_by_language[lang]
+        else:
+            max_last_seen = rows[int(np.argmax(np.where(mask, last_seen, -np.inf)))][3]
+        p[mask] = compute_probability(strength[mask], elapsed[mask], max_last_seen)
+
+    with transaction.atomic():
+        for start in range(0, len(word_pks), chunk_size):
+            models.Word.objects.bulk_update(
+                [
+                    models.Word(pk=pk, p=value)
+                    for pk, value in zip(
+                        word_pks[start : start + chunk_size].tolist(),
+                        p[start : start + chunk_size].tolist(),
+                    )
+                ],
+                fields=["p"],
+            )
+
+    words_changed(np.unique(languages).tolist())
+    return len(rows)
+
+
+def _then_clamped_add(clamp, add, low, high):
+    """
+    Compose x -> min(max(x + a, lo), hi) with a further clamped addition.
+    Any sequence of clamped additions collapses into a single one, so a word
+    reviewed many times in a batch still gets a flat SQL expression.
+    :param clamp: (a, lo, hi) describing the additions applied so far.
+    :return: (a, lo, hi) describing the combined additions.
+    """
+    a, lo, hi = clamp
+    lo, hi = lo + add, hi + add
+    return (a + add, min(max(lo, low), high), max(min(hi, high), low))
+
+
+def apply_review_results(results, chunk_size=500):
+    """
+    Apply a batch of review results in a single transaction.
+    Strength is updated with F() expressions clamped to 0..5, so concurrent
+    batches never lose each other's updates, and the rows are written back
+    with chunked `bulk_update`s instead of one save per word.
+    :param results: List of dicts with `word`, `language`, `correct` (a bool)
+        and an optional `seen_at` (datetime or ISO string, defaults to now).
+    :return: (number of words updated, list of (word, language) not found).
+    """
+    now = timezone.now()
+    reviews = []
+    for result in results:
+        word, language = result.get("word"), result.get("language")
+        if not word or not language:
+            raise ValueError("Every result needs a 'word' and a 'language'.")
+        assert_valid_language(language)
+        correct = result.get("correct")
+        if not isinstance(correct, bool):
+            raise ValueError(f"'correct' must be true or false for word '{word}'.")
+
+        seen_at = result.get("seen_at") or now
+        if isinstance(seen_at, str):
+            seen_at = parse_datetime(seen_at)
+            if seen_at is None:
+                raise ValueError(f"Invalid 'seen_at' for word '{word}'.")
+        if timezone.is_naive(seen_at):
+            seen_at = timezone.make_aware(seen_at)
+        reviews.append((word, language, correct, seen_at))
+
+    with transaction.atomic():
+        words = {
+            (w.word, w.language): w
+            for w in models.Word.objects.filter(
+                word__in={r[0] for r in reviews}, language__in={r[1] for r in reviews}
+            ).order_by()
+        }
+
+        updated = {}
+        reviewed = {}
+        missing = []
+        for word_str, language, correct, seen_at in reviews:
+            word = words.get((word_str, language))
+            if word is None:
+                missing.append((word_str, language))
+                continue
+            updated.setdefault(word.pk, (word, []))[1].append((seen_at, correct))
+
+        for word, word_results in updated.values():
+            # In the order they were seen, ties in the order they were sent
+            word_results.sort(key=lambda r: r[0])
+            strength = (0, -np.inf, np.inf)
+            for _, correct in word_results:
+                strength = _then_clamped_add(strength, 1 if correct else -1, 0, 5)
+            # One SM-2 step per batch, from the latest result: a card shown
+            # several times in one session has not been recalled over days
+            last_seen, correct = word_results[-1]
+            scheduler.schedule(word, scheduler.quality_from_correct(correct), last_seen)
+            add, low, high = strength
+            # What the expressions below evaluate to, the row cannot change
+            # under this transaction without failing its update
+            reviewed[word.pk] = (
+                int(min(max(word.strength + add, low), high)),
+                max(word.last_seen, last_seen),
+            )
+            word.strength = Least(Greatest(F("strength") + int(add), low), high)
+            word.last_seen = Greatest(
+                F("last_seen"), Value(last_seen, output_field=DateTimeField())
+            )
+        models.Word.objects.bulk_update(
+            [word for word, _ in updated.values()],
+            fields=["strength", "last_seen", "interval", "ease", "due_at"],
+            batch_size=chunk_size,
+        )
+
+        if updated and settings.WORDS_SAMPLING_MODE == "stored":
+            recompute_probabilities(chunk_size=chunk_size, pks=list(updated))
+
+    if settings.WORDS_SAMPLING_MODE == "lazy":
+        # Only strength, last_seen and the schedule changed: patch the sampler
+        # tables instead of reloading whole languages
+        for word, _ in updated.values():
+            word.strength, word.last_seen = reviewed[word.pk]
+        words_reviewed([word for word, _ in updated.values()])
+    else:
+        words_changed({word.language for word, _ in updated.values()})
+    return len(updated), missing
+
+
 def get_weighted_word(language=None, pk_range=None):
+    """
+    Return a word weighted by its p value. The draw itself runs against the
+    cached alias table in `words.sampler`, only the chosen row is fetched.
+    """
     query = models.Word.objects.all()
     if language:
         query = query.filter(language=language)
-    if pk_range:
-        query = query.filter(pk__range=pk_range)
-    if not query.exists():
-        raise ValueError("No words found.")
 
-    # Return a word weighted by its p values
-    p_values = query.values_list("p", flat=True)
-    # Normalize
-    s = np.sum(p_values)
-    p_values = [p / s for p in p_values]
-    return np.random.choice(list(query), p=p_values)
+    # The cached table can be stale if another process changed the words,
+    # rebuild it once before giving up on a missing row
+    for attempt in range(2):
+        pk = word_sampler.draw(language, pk_range)
+        word = query.filter(pk=pk).first()
+        if word is not None:
+            return word
+        word_sampler.invalidate([language] if language else None)
+    raise ValueError("No words found.")
+
+
+def get_weighted_words(language=None, n=10):
+    """
+    Return `n` distinct words drawn without replacement, weighted by their p
+    values, with their synonyms prefetched. Costs two queries whatever `n` is.
+    """
+    for attempt in range(2):
+        pks = word_sampler.sample(language, n)
+        words = with_synonyms(models.Word.objects.filter(pk__in=pks))
+        if language:
+            words = words.filter(language=language)
+        by_pk = {word.pk: word for word in words}
+        if len(by_pk) == len(pks):
+            break
+        # Stale table, see get_weighted_word
+        word_sampler.invalidate([language] if language else None)
+    return [by_pk[pk] for pk in pks if pk in by_pk]
+
+
+def get_due_words(language, n=10, now=None):
+    """
+    Return the next `n` words of `language` that are due for review, most
+    overdue first. Served by the (language, due_at) index, so the cost does
+    not depend on the size of the vocabulary.
+    """
+    assert_valid_language(language)
+    return list(
+        with_synonyms(
+            models.Word.objects.filter(
+                language=language, due_at__lte=now or timezone.now()
+            ).order_by("due_at", "pk")
+        )[:n]
+    )
 
 
 def get_words_list(language=None, page=1, per_page=10):
-    query = models.Word.objects.all().order_by("language", "word")
+    query = with_synonyms(models.Word.objects.all().order_by("language", "word"))
 
     if language:
         query = query.filter(language=language)  # fixed typo
@@ -132,38 +474,528 @@ def get_words_list(language=None, page=1, per_page=10):
         words_page = paginator.page(page)
     except PageNotAnInteger:
         page = 1
+        words_page = paginator.page(page)
     except EmptyPage:
         page = paginator.num_pages
-    finally:
         words_page = paginator.page(page)
 
-    return (words_page, paginator.num_pages, page, query.count())
+    return (words_page, paginator.num_pages, page, paginator.count)
+
+
+def get_words_cursor(language=None, cursor=None, per_page=10):
+    """
+    Keyset paginated list of words in (language, word) order.
+    Unlike `get_words_list` there is no COUNT(*) and no OFFSET, so a deep
+    page costs the same as the first one.
+    Args:
+        language (str): Only list words of this language.
+        cursor (str): Cursor returned with the previous page.
+        per_page (int): Number of words per page.
+    Returns:
+        words (list[models.Word]): The words of the page.
+        next (str): Cursor for the next page, None on the last page.
+    """
+    query = with_synonyms(models.Word.objects.order_by("language", "word"))
+    if language:
+        assert_valid_language(language)
+        query = query.filter(language=language)
+    if cursor:
+        after_language, after_word = decode_cursor(cursor, 2)
+        query = query.filter(
+            Q(language__gt=after_language)
+            | Q(language=after_language, word__gt=after_word)
+        )
+
+    words = list(query[: per_page + 1])
+    if len(words) > per_page:
+        last = words[per_page - 1]
+        return words[:per_page], encode_cursor([last.language, last.word])
+    return words, None
+
+
+def iter_words_by_name(language=None, chunk_size=500):
+    """
+    Yield words in (word, language) order, one keyset query per chunk.
+    No database cursor stays open between chunks, so the iteration can be
+    suspended (e.g. by a terminal pager) across requests.
+    """
+    query = models.Word.objects.order_by("word", "language")
+    if language:
+        assert_valid_language(language)
+        query = query.filter(language=language)
+
+    after = None
+    while True:
+        chunk = query
+        if after:
+            chunk = chunk.filter(
+                Q(word__gt=after[0]) | Q(word=after[0], language__gt=after[1])
+            )
+        words = list(chunk[:chunk_size])
+        yield from words
+        if len(words) < chunk_size:
+            return
+        after = (words[-1].word, words[-1].language)
+
+
+def count_words(language=None):
+    """
+    Number of words (of a language). The count goes through the read-through
+    cache under the language's data version, so every worker sees it change
+    with the first committed write.
+    """
+    query = models.Word.objects.all()
+    if language:
+        assert_valid_language(language)
+        query = query.filter(language=language)
+    return caching.get_or_compute("count", language, {}, query.count)
+
+
+def complete_words(prefix, language=None, k=10):
+    """
+    Distinct words starting with `prefix` in alphabetical order.
+    A range condition rather than LIKE, so the (language, word) index is used.
+    :param k: Maximum number of words.
+    """
+    # U+10FFFF sorts after every character a word can continue with
+    query = models.Word.objects.filter(word__gte=prefix, word__lt=prefix + "\U0010ffff")
+    if language:
+        assert_valid_language(language)
+        query = query.filter(language=language)
+    return list(
+        query.order_by("word").values_list("word", flat=True).distinct()[:k]
+    )
+
+
+def encode_cursor(values):
+    """Turn the sort key of the last row of a page into an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, size):
+    """Inverse of `encode_cursor`, raising ValueError for malformed cursors."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor.")
+    return values
+
+
+def get_translation_pairs(language, translation_language, after=None, limit=10):
+    """
+    Page through the (word, translation) pairs between two languages.
+    A single join over the synonyms through table, ordered by (word,
+    translation) and paged with a keyset cursor, so every page costs the same.
+    Args:
+        language (str): The language of the words.
+        translation_language (str): The language of the translations.
+        after (str): Cursor returned with the previous page.
+        limit (int): Maximum number of pairs to return.
+    Returns:
+        pairs (list[tuple[str, str]]): The (word, translation) pairs.
+        next (str): Cursor for the next page, None on the last page.
+    """
+    assert_valid_language(language)
+    assert_valid_language(translation_language)
+
+    query = models.Word.synonyms.through.objects.filter(
+        from_word__language=language, to_word__language=translation_language
+    )
+    if after:
+        word, translation = decode_cursor(after, 2)
+        query = query.filter(
+            Q(from_word__word__gt=word)
+            | Q(from_word__word=word, to_word__word__gt=translation)
+        )
+
+    pairs = list(
+        query.order_by("from_word__word", "to_word__word").values_list(
+            "from_word__word", "to_word__word"
+        )[: limit + 1]
+    )
+    if len(pairs) > limit:
+        return pairs[:limit], encode_cursor(pairs[limit - 1])
+    return pairs, None
 
 
 def update_word_synonyms(word_str, language, synonym_strs, synonym_language):
     """
     Update the synonyms of a word, adding new synonym words to the database if needed.
-    This will replace the word's synonyms with the provided list.
+    This will replace the word's synonyms in `synonym_language` with the
+    provided list, its synonyms in other languages are kept.
+    The query count does not depend on the number of synonyms: existing
+    synonyms are fetched with one query, missing ones are created with
+    `bulk_create` and the links are changed with one through-table DELETE
+    and one INSERT, in both directions like `synonyms.add` / `remove`.
     Args:
         word_str (str): The word whose synonyms to update.
-        language (str): The language of the word and synonyms.
+        language (str): The language of the word.
         synonym_strs (list[str]): List of synonym words (strings).
+        synonym_language (str): The language of the synonyms.
     Returns:
         word (models.Word): The updated word object.
-        created_synonyms (list[models.Word]): List of synonym Word objects created.
+        synonyms (list[models.Word]): The synonyms of the word in
+            `synonym_language`, in the order given.
+    """
+    word = get_word(word=word_str, language=language, prefetch_synonyms=False)
+    assert_valid_language(synonym_language)
+    names = [s for s in dict.fromkeys(str(s) for s in synonym_strs) if s]
+
+    with transaction.atomic():
+        resolved = {
+            w.word: w
+            for w in models.Word.objects.filter(
+                language=synonym_language, word__in=names
+            ).order_by()
+        }
+        to_create = [
+            models.Word(word=name, language=synonym_language)
+            for name in names
+            if name not in resolved
+        ]
+        created = _bulk_create_resolved(
+            to_create, Q(language=synonym_language, word__in=names)
+        )
+        resolved.update((name, obj) for (name, _), obj in created.items())
+        # A word cannot be a synonym of itself
+        synonyms = [resolved[name] for name in names if resolved[name].pk != word.pk]
+
+        Through = models.Word.synonyms.through
+        current = set(
+            Through.objects.filter(
+                from_word_id=word.pk, to_word__language=synonym_language
+            ).values_list("to_word_id", flat=True)
+        )
+        wanted = {synonym.pk for synonym in synonyms}
+        to_remove = current - wanted
+        to_add = wanted - current
+        if to_remove:
+            Through.objects.filter(
+                Q(from_word_id=word.pk, to_word_id__in=to_remove)
+                | Q(from_word_id__in=to_remove, to_word_id=word.pk)
+            ).delete()
+        if to_add:
+            Through.objects.bulk_create(
+                [Through(from_word_id=word.pk, to_word_id=pk) for pk in to_add]
+                + [Through(from_word_id=pk, to_word_id=word.pk) for pk in to_add],
+                ignore_conflicts=True,
+            )
+
+    if to_create or to_remove or to_add:
+        words_changed({word.language, synonym_language})
+    return word, synonyms
+
+
+class BatchError(ValueError):
+    """Operation `index` of a batch failed with `error`."""
+
+    def __init__(self, index, error):
+        self.index = index
+        self.error = error
+        super().__init__(f"Operation {index} failed: {error}")
+
+
+def create_words(pairs):
     """
-    # Get or create the main word
-    word = get_word(word=word_str, language=language)
+    Set-based `update_or_create_word` for many words: one query finds the
+    existing ones, the missing ones are created with `bulk_create` and the
+    existing ones get their strength reset with one UPDATE.
+    Args:
+        pairs (list[tuple]): (word, language) pairs.
+    Returns:
+        list[tuple]: (word, created) for every pair, a repeated pair is only
+            created the first time.
+    Raises:
+        BatchError: For the first pair with an invalid language.
+    """
+    for i, (_, language) in enumerate(pairs):
+        try:
+            assert_valid_language(language)
+        except ValueError as e:
+            raise BatchError(i, e)
+    by_language = {}
+    for word, language in pairs:
+        by_language.setdefault(language, set()).add(word)
+
+    lookup = Q(pk__in=[])
+    for language, words in by_language.items():
+        lookup |= Q(language=language, word__in=words)
+    resolved = {
+        (w.word, w.language): w for w in models.Word.objects.filter(lookup).order_by()
+    }
+    existing = set(resolved)
+
+    to_create = [
+        models.Word(word=word, language=language)
+        for word, language in dict.fromkeys(pairs)
+        if (word, language) not in existing
+    ]
+    resolved = {**_bulk_create_resolved(to_create, lookup), **resolved}
+    models.Word.objects.filter(pk__in=[resolved[k].pk for k in existing]).update(
+        strength=0
+    )
+    for key in existing:
+        resolved[key].strength = 0
+    words_changed(set(by_language))
+
+    results = []
+    for key in pairs:
+        results.append((resolved[key], key not in existing))
+        existing.add(key)
+    return results
+
 
-    # Prepare synonym Word objects
-    created_synonyms = []
-    for s in synonym_strs:
+def remove_words(pairs):
+    """
+    Set-based `remove_word` for many words: they are looked up with one query
+    and deleted together, along with their synonym links.
+    Args:
+        pairs (list[tuple]): (word, language) pairs, the language may be None
+            if the word is unambiguous.
+    Raises:
+        BatchError: For the first pair that does not match exactly one (not
+            yet removed) word, with the error `get_word` would raise.
+    """
+    for i, (_, language) in enumerate(pairs):
         try:
-            synonym, _ = update_or_create_word(word=s, language=synonym_language)
-            create_synonym(word=word, synonym=synonym)
-            created_synonyms.append(synonym)
-        except Exception as e:
-            pass
-
-    # Set the synonyms (replace existing)
-    return word, created_synonyms
+            if language:
+                assert_valid_language(language)
+        except ValueError as e:
+            raise BatchError(i, e)
+    with_language = {(w, l) for w, l in pairs if l}
+    lookup = Q(word__in={w for w, l in pairs if not l})
+    for word, language in with_language:
+        lookup |= Q(word=word, language=language)
+    candidates = {}
+    for obj in models.Word.objects.filter(lookup).order_by("pk"):
+        candidates.setdefault(obj.word, []).append(obj)
+
+    removed = {}
+    for i, (word, language) in enumerate(pairs):
+        matches = [
+            obj
+            for obj in candidates.get(word, [])
+            if obj.pk not in removed and (not language or obj.language == language)
+        ]
+        if len(matches) > 1:
+            raise BatchError(
+                i, LookupError("Multiple words found, please specify a language.")
+            )
+        elif not matches:
+            raise BatchError(i, word_not_found(word, language))
+        removed[matches[0].pk] = matches[0]
+
+    # What `word_deleting` would otherwise look up word by word
+    links = (
+        models.Word.synonyms.through.objects.filter(from_word_id__in=removed)
+        .order_by()
+        .values_list("from_word_id", "to_word__language")
+    )
+    for obj in removed.values():
+        obj._synonym_languages = set()
+    for pk, language in links:
+        removed[pk]._synonym_languages.add(language)
+
+    collector = Collector(using=router.db_for_write(models.Word))
+    collector.collect(list(removed.values()))
+    collector.delete()
+
+
+BATCH_OPERATIONS = ("post_word", "delete_word", "update_word_synonyms")
+
+
+def _batch_arguments(operations, *names):
+    """Parameters `names` of every operation, in order."""
+    arguments = []
+    for i, operation in enumerate(operations):
+        missing = [name for name in names if not operation.get(name)]
+        if missing:
+            raise BatchError(
+                i,
+                ValueError(
+                    "Missing required parameters: "
+                    f"{', '.join(repr(n) for n in missing)}."
+                ),
+            )
+        arguments.append(tuple(operation[name] for name in names))
+    return arguments
+
+
+def _apply_batch_run(op, operations):
+    """Apply consecutive operations of the same kind, set-based if possible."""
+    if op == "post_word":
+        pairs = _batch_arguments(operations, "word", "language")
+        return [
+            {
+                "message": (
+                    f"Created word {word}." if created else f"Word {word} already exists."
+                ),
+                "created": created,
+            }
+            for word, created in create_words(pairs)
+        ]
+    if op == "delete_word":
+        words = _batch_arguments(operations, "word")
+        pairs = [(word, o.get("language")) for (word,), o in zip(words, operations)]
+        remove_words(pairs)
+        return [{"message": f"Word {word} deleted successfully."} for word, _ in pairs]
+    if op == "update_word_synonyms":
+        arguments = _batch_arguments(
+            operations, "word", "language", "synonym_list", "synonym_language"
+        )
+        results = []
+        for i, (word, language, synonym_list, synonym_language) in enumerate(arguments):
+            try:
+                _, synonyms = update_word_synonyms(
+                    word, language, synonym_list, synonym_language
+                )
+            except Exception as e:
+                raise BatchError(i, e)
+            results.append(
+                {
+                    "message": (
+                        f"Created synonyms {[s.word for s in synonyms]}."
+                        if synonyms
+                        else "No synonyms added."
+                    ),
+                    "created": bool(synonyms),
+                }
+            )
+        return results
+    raise BatchError(
+        0, ValueError(f"Unknown operation '{op}'. Must be one of {list(BATCH_OPERATIONS)}.")
+    )
+
+
+def apply_batch(operations):
+    """
+    Apply an ordered list of word operations in one transaction, so that a
+    whole deck edit costs a single commit. Runs of consecutive `post_word`
+    or `delete_word` operations are applied with one set-based step each.
+    Args:
+        operations (list[dict]): {"op": name, **parameters} with the
+            parameters of the endpoint of the same name, `name` being one of
+            `BATCH_OPERATIONS`.
+    Returns:
+        list[dict]: One {"op", "message"[, "created"]} result per operation.
+    Raises:
+        BatchError: If an operation fails, after rolling back the batch.
+    """
+    results = []
+    try:
+        with transaction.atomic():
+            index = 0
+            for op, run in groupby(operations, key=lambda o: o.get("op")):
+                run = list(run)
+                try:
+                    run_results = _apply_batch_run(op, run)
+                except BatchError as e:
+                    raise BatchError(index + e.index, e.error) from e.error
+                except Exception as e:
+                    raise BatchError(index, e) from e
+                results.extend({"op": op, **r} for r in run_results)
+                index += len(run)
+    except BatchError:
+        # The signals already patched the in-process caches with rolled back writes
+        words_changed()
+        raise
+    return results
+
+
+# Async variants for the views served from the ASGI app (see api.async_views).
+# Django 4.2 cannot prefetch while iterating asynchronously, so the synonyms
+# come from `asynonyms_of` and reach `WordSerializer` through its context.
+
+
+async def asynonyms_of(words):
+    """Synonyms of every word, as {pk: [synonym, ...]}, in one query."""
+    synonyms = {word.pk: [] for word in words}
+    if not synonyms:
+        return synonyms
+    links = (
+        models.Word.synonyms.through.objects.filter(from_word_id__in=synonyms)
+        .order_by("to_word__word")
+        .values_list("from_word_id", "to_word__word")
+    )
+    async for pk, synonym in links:
+        synonyms[pk].append(synonym)
+    return synonyms
+
+
+async def aget_word(word, language=None):
+    """Async `get_word`, without the synonym prefetch."""
+    query = models.Word.objects.filter(word=word)
+    if language:
+        assert_valid_language(language)
+        query = query.filter(language=language)
+
+    matches = [match async for match in query[:2]]
+    if len(matches) > 1:
+        raise LookupError("Multiple words found, please specify a language.")
+    elif not matches:
+        # Building the suggestions may load the fuzzy index
+        raise await sync_to_async(word_not_found)(word, language)
+    return matches[0]
+
+
+async def aget_weighted_word(language=None):
+    """Async `get_weighted_word`."""
+    query = models.Word.objects.all()
+    if language:
+        query = query.filter(language=language)
+
+    for attempt in range(2):
+        # Hold on to the table, an invalidation in between must not make the
+        # draw rebuild it with the sync ORM on the event loop
+        table = await caching.run_cache(word_sampler.loaded_table, language)
+        if table is None:
+            table = await sync_to_async(word_sampler.get_table)(language)
+        pk = word_sampler.draw(language, table=table)
+        word = await query.filter(pk=pk).afirst()
+        if word is not None:
+            return word
+        word_sampler.invalidate([language] if language else None)
+    raise ValueError("No words found.")
+
+
+async def aget_words_list(language=None, page=1, per_page=10):
+    """Async `get_words_list`, returning the words of the page as a list."""
+    query = models.Word.objects.order_by("language", "word")
+    if language:
+        query = query.filter(language=language)
+
+    paginator = Paginator(query, per_page)
+    # Paginator would count synchronously, hand it the count instead
+    paginator.count = await query.acount()
+    try:
+        number = paginator.validate_number(page)
+    except PageNotAnInteger:
+        page = number = 1
+    except EmptyPage:
+        page = number = paginator.num_pages
+
+    bottom = (number - 1) * paginator.per_page
+    words = [word async for word in query[bottom : bottom + paginator.per_page]]
+    return (words, paginator.num_pages, page, paginator.count)
+
+
+async def aget_words_cursor(language=None, cursor=None, per_page=10):
+    """Async `get_words_cursor`."""
+    query = models.Word.objects.order_by("language", "word")
+    if language:
+        assert_valid_language(language)
+        query = query.filter(language=language)
+    if cursor:
+        after_language, after_word = decode_cursor(cursor, 2)
+        query = query.filter(
+            Q(language__gt=after_language)
+            | Q(language=after_language, word__gt=after_word)
+        )
+
+    words = [word async for word in query[: per_page + 1]]
+    if len(words) > per_page:
+        last = words[per_page - 1]
+        return words[:per_page], encode_cursor([last.language, last.word])
+    return words, None
@@ -0,0 +1,106 @@
+import csv
+import json
+from itertools import groupby
+from operator import itemgetter
+
+from django.db.models import FilteredRelation, Q
+
+import words.models as models
+from words.database_functions import assert_valid_language
+
+# Columns understood by the `upload_csv` command
+CSV_FIELDS = ["word", "translation", "last_seen", "strength"]
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+def iter_words(language, translation_language=None, chunk_size=2000):
+    """
+    Yield every word of `language` with its synonyms, in word order.
+    The words and their synonyms come out of a single ordered LEFT JOIN that
+    is read in chunks, so memory stays flat whatever the size of the language.
+    :param translation_language: Only include synonyms in this language.
+    :return: Iterator of (word, translations, last_seen, strength) tuples.
+    :raises ValueError: Right away for an invalid language, not on the first chunk.
+    """
+    assert_valid_language(language)
+    if translation_language:
+        assert_valid_language(translation_language)
+    return _iter_words(language, translation_language, chunk_size)
+
+
+def _iter_words(language, translation_language, chunk_size):
+    query = models.Word.objects.filter(language=language)
+    if translation_language:
+        query = query.annotate(
+            translation=FilteredRelation(
+                "synonyms", condition=Q(synonyms__language=translation_language)
+            )
+        )
+        synonym_field = "translation__word"
+    else:
+        synonym_field = "synonyms__word"
+
+    rows = (
+        query.order_by("word", "pk", synonym_field)
+        .values_list("pk", "word", "last_seen", "strength", synonym_field)
+        .iterator(chunk_size=chunk_size)
+    )
+    for _, group in groupby(rows, key=itemgetter(0)):
+        group = list(group)
+        _, word, last_seen, strength, _ = group[0]
+        translations = [row[4] for row in group if row[4] is not None]
+        yield word, translations, last_seen, strength
+
+
+class _Echo:
+    """File-like object whose `write` hands back the line, for streaming csv."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(words):
+    """Render `iter_words` output as `upload_csv` compatible CSV lines."""
+    writer = csv.writer(_Echo(), delimiter=";")
+    yield writer.writerow(CSV_FIELDS)
+    for word, translations, last_seen, strength in words:
+        yield writer.writerow(
+            [word, ", ".join(translations), last_seen.isoformat(), strength]
+        )
+
+
+def iter_jsonl(words, language):
+    """Render `iter_words` output as one JSON object per line."""
+    for word, translations, last_seen, strength in words:
+        yield json.dumps(
+            {
+                "word": word,
+                "language": language,
+                "translations": translations,
+                "last_seen": last_seen.isoformat(),
+                "strength": strength,
+            },
+            ensure_ascii=False,
+        ) + "\n"
+
+
+def export_words(language, translation_language=None, format="csv", chunk_size=2000):
+    """
+    Stream the words of `language` in the given format.
+    :param translation_language: Required for csv, whose single translation
+        column `upload_csv` reads back as words of one language.
+    :return: Iterator of text chunks.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Invalid format '{format}'. Must be one of {list(EXPORT_FORMATS)}."
+        )
+    if format == "csv" and not translation_language:
+        raise ValueError("A translation language is required for csv exports.")
+    words = iter_words(language, translation_language, chunk_size=chunk_size)
+    if format == "csv":
+        return iter_csv(words)
+    return iter_jsonl(words, language)
@@ -0,0 +1,203 @@
+import threading
+from collections import Counter
+
+import words.models as models
+from words import versions
+
+# Gram length, every edit changes at most this many grams of a word
+Q = 3
+
+
+def grams(word):
+    """Distinct case-folded trigrams of ` word `, padded to mark both ends."""
+    padded = f" {word.casefold()} "
+    return {padded[i : i + Q] for i in range(len(padded) - Q + 1)}
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Levenshtein distance between `a` and `b`, or `max_distance + 1` as soon
+    as it is known to be larger than `max_distance`.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class _TrigramIndex:
+    """Inverted index from trigrams to the (case-folded) words of one language."""
+
+    # Data version (see words.versions) the index is current at
+    version = None
+
+    def __init__(self, words=()):
+        self._postings = {}
+        # Case-folded key -> spellings stored under it
+        self._spellings = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        key = word.casefold()
+        spellings = self._spellings.setdefault(key, set())
+        if not spellings:
+            for gram in grams(key):
+                self._postings.setdefault(gram, set()).add(key)
+        spellings.add(word)
+
+    def discard(self, word):
+        key = word.casefold()
+        spellings = self._spellings.get(key)
+        if spellings is None:
+            return
+        spellings.discard(word)
+        if spellings:
+            return
+        del self._spellings[key]
+        for gram in grams(key):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._postings[gram]
+
+    def search(self, word, max_distance):
+        """
+        Spellings within `max_distance` edits of `word` (ignoring case).
+        Only words sharing enough trigrams with `word` to possibly be that
+        close are compared, which is what keeps a lookup from scanning the
+        whole vocabulary.
+        :return: List of (distance, spelling).
+        """
+        key = word.casefold()
+        query = grams(key)
+        shared = Counter()
+        for gram in query:
+            shared.update(self._postings.get(gram, ()))
+        # Each edit destroys at most Q grams of the word, require one in common
+        needed = max(len(query) - Q * max_distance, 1)
+
+        matches = []
+        for candidate, count in shared.items():
+            if count < needed:
+                continue
+            distance = edit_distance(key, candidate, max_distance)
+            if distance <= max_distance:
+                matches.extend((distance, s) for s in self._spellings[candidate])
+        return matches
+
+
+class FuzzyIndex:
+    """
+    In-process "did you mean" index, one trigram index per language.
+    Indexes are built lazily and kept up to date by the signals in
+    `words.signals`, bulk writes drop them (see `words_changed`). An index
+    whose data version has moved on, e.g. after a write in another worker,
+    is rebuilt.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = {}
+        self._generations = {}
+
+    def _get_indexes(self, languages):
+        """Return the indexes of `languages`, building the missing ones in one query."""
+        # Read before the rows: a write committing in between only costs one
+        # more rebuild
+        current = versions.get_versions(languages)
+        indexes = {language: self._indexes.get(language) for language in languages}
+        missing = [
+            language
+            for language, index in indexes.items()
+            if index is None or index.version != current[language]
+        ]
+        if not missing:
+            return indexes
+
+        with self._lock:
+            generations = {l: self._generations.get(l, 0) for l in missing}
+        built = {language: _TrigramIndex() for language in missing}
+        rows = (
+            models.Word.objects.filter(language__in=missing)
+            .order_by()
+            .values_list("language", "word")
+        )
+        for language, word in rows.iterator():
+            built[language].add(word)
+        for language, index in built.items():
+            index.version = current[language]
+        with self._lock:
+            for language, index in built.items():
+                # Only keep the index if nothing changed while it was being built
+                if self._generations.get(language, 0) == generations[language]:
+                    self._indexes[language] = index
+        return {**indexes, **built}
+
+    def suggest(self, word, language=None, max_distance=2, limit=5):
+        """
+        Words closest to `word`, nearest first.
+        :param language: Restrict the suggestions to one language.
+        :param max_distance: Maximum number of edits.
+        :param limit: Maximum number of suggestions.
+        """
+        languages = [language] if language else models.Languages.values
+        matches = set()
+        for index in self._get_indexes(languages).values():
+            with self._lock:
+                matches.update(index.search(word, max_distance))
+        return [spelling for _, spelling in sorted(matches)][:limit]
+
+    def _update(self, language, method, word):
+        with self._lock:
+            index = self._indexes.get(language)
+            if index is not None:
+                getattr(index, method)(word)
+            else:
+                # An index being built right now may have missed the change
+                self._generations[language] = self._generations.get(language, 0) + 1
+
+    def add(self, word, language):
+        self._update(language, "add", word)
+
+    def discard(self, word, language):
+        self._update(language, "discard", word)
+
+    def expect_bump(self, languages=None):
+        """
+        Account for a write to `languages` (all of them if `None`) that the
+        indexes already reflect, see `WordSampler.expect_bump`.
+        """
+        with self._lock:
+            if languages is None:
+                languages = set(self._indexes)
+            elif isinstance(languages, str):
+                languages = [languages]
+            for language in languages:
+                index = self._indexes.get(language)
+                if index is not None:
+                    index.version += 1
+
+    def invalidate(self, languages=None):
+        """Drop the indexes of the given languages (all of them if `None`)."""
+        with self._lock:
+            if languages is None:
+                languages = set(self._indexes) | set(self._generations)
+            elif isinstance(languages, str):
+                languages = [languages]
+            for language in languages:
+                self._indexes.pop(language, None)
+                self._generations[language] = self._generations.get(language, 0) + 1
+
+
+fuzzy_index = FuzzyIndex()
@@ -0,0 +1,165 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.test.utils import override_settings
+
+import words.database_functions as wdbf
+import words.models as models
+from terminal.models import CommandHistory
+
+# Pragmas, transaction mode and CONN_MAX_AGE of every profile, "configured"
+# is the one from the settings
+PROFILES = {
+    # What the project ran with before: rollback journal, full sync, deferred
+    # transactions and a new connection per request (the driver still waits
+    # 5 s for locks)
+    "legacy": ({"journal_mode": "delete", "synchronous": "full"}, "deferred", 0),
+    "wal": ({"journal_mode": "wal", "synchronous": "normal"}, "deferred", 0),
+    "configured": None,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run threads of mixed word reads, word edits and history writes "
+        "against a scratch copy of the schema, once per SQLite profile, and "
+        "report throughput and 'database is locked' errors"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads", type=int, default=8, help="Concurrent threads (default: 8)"
+        )
+        parser.add_argument(
+            "--operations",
+            type=int,
+            default=300,
+            help="Operations per thread (default: 300)",
+        )
+        parser.add_argument(
+            "--write-ratio",
+            type=float,
+            default=0.3,
+            help="Share of operations that write (default: 0.3)",
+        )
+        parser.add_argument(
+            "--words",
+            type=int,
+            default=2000,
+            help="Number of words to seed the scratch database with (default: 2000)",
+        )
+        parser.add_argument(
+            "--profiles",
+            nargs="+",
+            choices=list(PROFILES),
+            default=list(PROFILES),
+            help="Profiles to run (default: all)",
+        )
+
+    def operation(self, pks, names, write_ratio):
+        """One request's worth of work, like the matching endpoint does it."""
+        if random.random() < write_ratio:
+            if random.random() < 0.5:
+                CommandHistory.objects.create(command="bench")
+            else:
+                # Read then write in one transaction, like a review
+                with transaction.atomic():
+                    word = models.Word.objects.get(pk=random.choice(pks))
+                    wdbf.review_word(word, random.random() < 0.5)
+        elif random.random() < 0.5:
+            wdbf.get_word(random.choice(names), "en")
+        else:
+            page, *_ = wdbf.get_words_list("en", random.randint(1, 50), 20)
+            list(page)
+
+    def worker(self, pks, names, options, stats):
+        latencies, locked = [], 0
+        try:
+            for _ in range(options["operations"]):
+                # Mimic the request cycle, which honours CONN_MAX_AGE
+                close_old_connections()
+                start = time.perf_counter()
+                try:
+                    self.operation(pks, names, options["write_ratio"])
+                except OperationalError as e:
+                    if "locked" not in str(e):
+                        raise
+                    locked += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+                close_old_connections()
+        finally:
+            connection.close()
+        with stats["lock"]:
+            stats["latencies"].extend(latencies)
+            stats["locked"] += locked
+
+    def run_profile(self, name, pks, names, options):
+        pragmas, transaction_mode, conn_max_age = PROFILES[name] or (
+            settings.SQLITE_PRAGMAS,
+            settings.SQLITE_TRANSACTION_MODE,
+            self.conn_max_age,
+        )
+        stats = {"lock": threading.Lock(), "latencies": [], "locked": 0}
+        connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+        with override_settings(
+            SQLITE_PRAGMAS=pragmas, SQLITE_TRANSACTION_MODE=transaction_mode
+        ):
+            # The next connection applies the profile (the journal mode sticks
+            # to the file, so no other connection may be open)
+            connection.close()
+            connection.ensure_connection()
+            connection.close()
+
+            threads = [
+                threading.Thread(target=self.worker, args=(pks, names, options, stats))
+                for _ in range(options["threads"])
+            ]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+        latencies = sorted(stats["latencies"])
+        p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] if latencies else 0
+        self.stdout.write(
+            f"{name:<11} {len(latencies) / elapsed:8.1f} ops/s  "
+            f"p99 {p99 * 1000:8.2f} ms  locked {stats['locked']}"
+        )
+
+    def handle(self, *args, **options):
+        self.conn_max_age = connection.settings_dict["CONN_MAX_AGE"]
+        database = connection.settings_dict["NAME"]
+        scratch = tempfile.mkdtemp(prefix="bench_sqlite_")
+        connection.close()
+        connection.settings_dict["NAME"] = os.path.join(scratch, "db.sqlite3")
+        try:
+            call_command("migrate", verbosity=0)
+            models.Word.objects.bulk_create(
+                models.Word(word=f"word{i}", language="en")
+                for i in range(options["words"])
+            )
+            pks = list(models.Word.objects.values_list("pk", flat=True))
+            names = [f"word{i}" for i in range(options["words"])]
+
+            self.stdout.write(
+                f"{options['threads']} threads x {options['operations']} operations, "
+                f"{options['write_ratio']:.0%} writes"
+            )
+            for name in options["profiles"]:
+                self.run_profile(name, pks, names, options)
+        finally:
+            connection.close()
+            connection.settings_dict["NAME"] = database
+            connection.settings_dict["CONN_MAX_AGE"] = self.conn_max_age
+            shutil.rmtree(scratch, ignore_errors=True)
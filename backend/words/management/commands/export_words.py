@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from words.export import EXPORT_FORMATS, export_words
+
+
+class Command(BaseCommand):
+    help = "Export the words of a language, as CSV that upload_csv can read back or as JSON lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("language", type=str, help="Language of the words")
+        parser.add_argument(
+            "translation",
+            type=str,
+            nargs="?",
+            default=None,
+            help="Only export translations in this language, required for csv "
+            "(default for jsonl: all synonyms)",
+        )
+        parser.add_argument(
+            "--format",
+            choices=list(EXPORT_FORMATS),
+            default="csv",
+            help="Output format (default: csv)",
+        )
+        parser.add_argument(
+            "--output",
+            type=str,
+            default=None,
+            help="File to write to (default: stdout)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            chunks = export_words(
+                options["language"], options["translation"], format=options["format"]
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as f:
+                f.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand
+from words.database_functions import recompute_probabilities
+
+
+class Command(BaseCommand):
+    help = "Recompute the probability of every word in one vectorized pass"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--language",
+            type=str,
+            default=None,
+            help="Only recompute words of this language (default: all)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of rows written per bulk update (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = recompute_probabilities(
+            language=options["language"], chunk_size=options["chunk_size"]
+        )
+        elapsed = time.perf_counter() - start
+
+        rate = count / elapsed if elapsed > 0 else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recomputed {count} words in {elapsed:.2f}s ({rate:.0f} rows/s)"
+            )
+        )
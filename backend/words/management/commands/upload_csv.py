@@ -1,6 +1,8 @@
 import csv
+import time
+from itertools import islice
 from django.core.management.base import BaseCommand
-from words.database_functions import update_or_create_word, create_synonym
+from words.database_functions import import_words
 from django.utils import timezone
 from datetime import datetime
 
@@ -20,60 +22,76 @@ class Command(BaseCommand):
             type=str,
             help="Language of the translations in the CSV file",
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of rows imported per transaction (default: 1000)",
+        )
+
+    def parse_row(self, row):
+        """Turn a CSV row into the (word, translations, last_seen, strength) tuple import_words expects."""
+        last_seen = row["last_seen"]
+        if last_seen:
+            dt = datetime.fromisoformat(last_seen)
+            last_seen = timezone.make_aware(dt) if timezone.is_naive(dt) else dt
+        else:
+            last_seen = None
+
+        # Split the translation field by commas and strip whitespace
+        translation = row["translation"] or ""
+        translations = [t.strip() for t in translation.split(",") if t.strip()]
+        return row["word"], translations, last_seen, int(row["strength"] or 0)
 
     def handle(self, *args, **options):
         csv_file = options["csv_file"]
         lang = options["language"]
         translation_lang = options["translation"]
+        chunk_size = options["chunk_size"]
 
         self.stdout.write(self.style.SUCCESS(f"Processing file: {csv_file}"))
 
+        total_rows = 0
+        total_created = 0
+        start = time.perf_counter()
         with open(csv_file, newline="", encoding="utf-8") as f:
             reader = csv.DictReader(f, delimiter=";")
-            for row in reader:
-                word = row["word"]
-                translation = row["translation"]
-                last_seen = row["last_seen"]
-                strength = row["strength"]
-                # Process each row as needed
-                self.stdout.write(f"{word}, {translation}, {last_seen}, {strength}")
+            while True:
+                chunk = list(islice(reader, chunk_size))
+                if not chunk:
+                    break
 
-                # Update or create the word
-                try:
-                    dt = datetime.fromisoformat(last_seen)
-                    if timezone.is_naive(dt):
-                        last_seen = timezone.make_aware(dt)
-                    else:
-                        last_seen = dt
+                rows = []
+                for row in chunk:
+                    try:
+                        rows.append(self.parse_row(row))
+                    except Exception as e:
+                        self.stdout.write(
+                            self.style.ERROR(
+                                f"Error processing word '{row.get('word')}': {e}"
+                            )
+                        )
 
-                    word_obj = update_or_create_word(
-                        word=word,
-                        language=lang,
-                        strength=int(strength),
-                        last_seen=last_seen,
-                    )
-
-                    # Split the translation field by commas, strip whitespace, and add each as a synonym
-                    if translation:
-                        translations = [
-                            t.strip() for t in translation.split(",") if t.strip()
-                        ]
-                        for trans_word in translations:
-                            try:
-                                # Create or update the translation word
-                                trans_obj = update_or_create_word(
-                                    word=trans_word,
-                                    language=translation_lang,
-                                )
-                                # Add synonym relationship between the main word and the translation
-                                create_synonym(word_obj, trans_obj)
-                            except Exception as e:
-                                self.stdout.write(
-                                    self.style.ERROR(
-                                        f"Error processing synonym '{trans_word}' for '{word}': {e}"
-                                    )
-                                )
+                try:
+                    created, _ = import_words(rows, lang, translation_lang)
                 except Exception as e:
                     self.stdout.write(
-                        self.style.ERROR(f"Error processing word '{word}': {e}")
+                        self.style.ERROR(
+                            f"Error importing rows {total_rows + 1}-{total_rows + len(chunk)}: {e}"
+                        )
                     )
+                    created = 0
+
+                total_rows += len(chunk)
+                total_created += created
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{total_rows} rows, {total_created} new words "
+                    f"({total_rows / elapsed:.0f} rows/s)"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {total_rows} rows in {time.perf_counter() - start:.2f}s"
+            )
+        )
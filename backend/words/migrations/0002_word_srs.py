@@ -0,0 +1,32 @@
+# Generated by Django 4.2.9 on 2026-10-18 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('words', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='word',
+            name='due_at',
+            field=models.DateTimeField(default='1970-01-01T00:00:00Z'),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='ease',
+            field=models.FloatField(default=2.5),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='interval',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['language', 'due_at'], name='word_language_due_at_idx'),
+        ),
+    ]
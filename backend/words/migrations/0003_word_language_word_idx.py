@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('words', '0002_word_srs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['language', 'word'], name='word_language_word_idx'),
+        ),
+    ]
@@ -26,6 +26,11 @@ class Word(models.Model):
     p = models.FloatField(default=0.0)
     last_seen = models.DateTimeField(default="1970-01-01T00:00:00Z")
 
+    # Spaced repetition (SM-2), see words.scheduler
+    interval = models.IntegerField(default=0)  # days until the next review
+    ease = models.FloatField(default=2.5)
+    due_at = models.DateTimeField(default="1970-01-01T00:00:00Z")
+
     synonyms = models.ManyToManyField(
         "Word",
         symmetrical=True,
@@ -35,6 +40,17 @@ class Word(models.Model):
     def __str__(self):
         return self.word
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored spelling so that renames can be told apart
+        # from other saves (see words.signals)
+        if "word" in field_names:
+            instance._stored_word = values[field_names.index("word")]
+        if "language" in field_names:
+            instance._stored_language = values[field_names.index("language")]
+        return instance
+
     def get_synonyms(self, language=None):
         if language:
             return self.synonyms.filter(language=language)
@@ -43,3 +59,7 @@ class Word(models.Model):
     class Meta:
         ordering = ["word"]
         unique_together = [("word", "language")]
+        indexes = [
+            models.Index(fields=["language", "due_at"], name="word_language_due_at_idx"),
+            models.Index(fields=["language", "word"], name="word_language_word_idx"),
+        ]
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+def sigmoid(x, a, b):
+    return 1 / (1 + pow(a, x - b))
+
+
+def compute_probability(strength, elapsed_seconds, max_last_seen=None):
+    """
+    Probability of showing a word, works on scalars as well as NumPy arrays.
+    :param strength: How well the word is known.
+    :param elapsed_seconds: Seconds since the word was last seen.
+    :param max_last_seen: Most recent `last_seen` in the word's language.
+    """
+    # Show weaker words first
+    with np.errstate(over="ignore"):
+        p = sigmoid(np.asarray(strength, dtype=np.float64), 1000, 0.5)
+
+    # Adjust probability based on the time since the word was last seen
+    if max_last_seen and hasattr(max_last_seen, "second") and max_last_seen.second != 0:
+        elapsed_seconds = elapsed_seconds / max_last_seen.second
+    return p * elapsed_seconds
+
+
+def linear_recency(elapsed_seconds, scale):
+    """Grows without bound, the longer a word is unseen the likelier it is."""
+    return elapsed_seconds / scale
+
+
+def log_recency(elapsed_seconds, scale):
+    """Grows slowly so long-forgotten words do not drown out everything else."""
+    return np.log1p(elapsed_seconds / scale)
+
+
+def saturating_recency(elapsed_seconds, scale):
+    """Approaches 1 once a word has been unseen for a few `scale`s."""
+    return 1 - np.exp(-elapsed_seconds / scale)
+
+
+RECENCY_TERMS = {
+    "linear": linear_recency,
+    "log": log_recency,
+    "saturating": saturating_recency,
+}
+
+
+def get_recency_term(name):
+    """Look up a recency term by name."""
+    if name not in RECENCY_TERMS:
+        raise ValueError(
+            f"Invalid recency term '{name}'. Must be one of {list(RECENCY_TERMS)}."
+        )
+    return RECENCY_TERMS[name]
+
+
+def draw_time_probability(strength, last_seen, now, recency="linear", scale=86400.0):
+    """
+    Probability of showing a word computed at draw time instead of read from
+    the stored `Word.p`, works on scalars as well as NumPy arrays.
+    :param strength: How well the word is known.
+    :param last_seen: When the word was last seen, as a UNIX timestamp.
+    :param now: The current time as a UNIX timestamp, shared by the whole draw.
+    :param recency: Name of the recency term, see `RECENCY_TERMS`.
+    :param scale: Number of seconds the recency term is scaled by.
+    """
+    with np.errstate(over="ignore"):
+        p = sigmoid(np.asarray(strength, dtype=np.float64), 1000, 0.5)
+    elapsed = np.clip(now - np.asarray(last_seen, dtype=np.float64), 0.0, None)
+    return p * get_recency_term(recency)(elapsed, scale)
@@ -0,0 +1,342 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+import words.models as models
+from words import versions
+from words.probability import draw_time_probability
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table over a fixed list of weights.
+    Building the table is O(n), every draw afterwards is O(1).
+    """
+
+    def __init__(self, weights):
+        weights = np.nan_to_num(np.asarray(weights, dtype=np.float64), nan=0.0)
+        weights = np.clip(weights, 0.0, None)
+        n = len(weights)
+        if n == 0:
+            raise ValueError("Cannot build an alias table without weights.")
+
+        total = weights.sum()
+        if not np.isfinite(total) or total <= 0:
+            # Nothing to weight by (e.g. every p is still 0), draw uniformly
+            scaled = np.ones(n)
+        else:
+            scaled = weights * (n / total)
+
+        prob = np.ones(n)
+        alias = np.arange(n)
+        small = np.flatnonzero(scaled < 1.0).tolist()
+        large = np.flatnonzero(scaled >= 1.0).tolist()
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # Whatever is left over is 1.0 up to rounding error
+        for i in small + large:
+            prob[i] = 1.0
+
+        self.prob = prob
+        self.alias = alias
+
+    def __len__(self):
+        return len(self.prob)
+
+    def draw(self, rng):
+        """Draw one index from the table."""
+        i = int(rng.integers(len(self.prob)))
+        return i if rng.random() < self.prob[i] else int(self.alias[i])
+
+
+def _timestamp(value):
+    """UNIX timestamp of a datetime (or of an ISO string, e.g. the field default)."""
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    return value.timestamp()
+
+
+def _weighted_index(rng, weights):
+    """Draw an index proportionally to `weights`, uniformly if they are all 0."""
+    weights = np.clip(np.nan_to_num(weights), 0.0, None)
+    cdf = np.cumsum(weights)
+    if not len(cdf) or cdf[-1] <= 0:
+        return int(rng.integers(len(weights)))
+    i = int(np.searchsorted(cdf, rng.random() * cdf[-1], side="right"))
+    return min(i, len(cdf) - 1)
+
+
+class _LanguageTable(ABC):
+    """Snapshot of the sampling data for one language (or all of them)."""
+
+    mode = None
+    # Data version (see words.versions) the snapshot is current at
+    version = None
+
+    def __init__(self, pks):
+        self.pks = pks
+
+    def index_of(self, pk):
+        i = int(np.searchsorted(self.pks, pk))
+        if i < len(self.pks) and self.pks[i] == pk:
+            return i
+        return None
+
+    @abstractmethod
+    def weights(self, start, stop):
+        """Sampling weights of the words in [start, stop)."""
+
+    @abstractmethod
+    def patch(self, word):
+        """Update the entry of a saved word, `False` if the table must be rebuilt."""
+
+    def draw(self, rng, start=0, stop=None):
+        """Draw an index in [start, stop) weighted by `weights`."""
+        stop = len(self.pks) if stop is None else stop
+        return start + _weighted_index(rng, self.weights(start, stop))
+
+
+class _StoredTable(_LanguageTable):
+    """Weights are the persisted `Word.p` values, full draws use an alias table."""
+
+    mode = "stored"
+
+    def __init__(self, pks, p):
+        super().__init__(pks)
+        self.p = p
+        self.alias = AliasTable(p) if len(pks) else None
+
+    def weights(self, start, stop):
+        return self.p[start:stop]
+
+    def draw(self, rng, start=0, stop=None):
+        if start == 0 and stop in (None, len(self.pks)):
+            return self.alias.draw(rng)
+        return super().draw(rng, start, stop)
+
+    def patch(self, word):
+        i = self.index_of(word.pk)
+        # Any change to p means the alias table has to be rebuilt
+        return i is not None and self.p[i] == word.p
+
+
+class _LazyTable(_LanguageTable):
+    """Weights are computed at draw time from strength and last_seen."""
+
+    mode = "lazy"
+
+    def __init__(self, pks, strength, last_seen):
+        super().__init__(pks)
+        self.strength = strength
+        self.last_seen = last_seen
+
+    def weights(self, start, stop):
+        return draw_time_probability(
+            self.strength[start:stop],
+            self.last_seen[start:stop],
+            now=time.time(),
+            recency=settings.WORDS_RECENCY,
+            scale=settings.WORDS_RECENCY_SCALE,
+        )
+
+    def patch(self, word):
+        i = self.index_of(word.pk)
+        if i is None:
+            return False
+        self.strength[i] = word.strength
+        self.last_seen[i] = _timestamp(word.last_seen)
+        return True
+
+
+class WordSampler:
+    """
+    In-process weighted sampler over the words of each language.
+
+    Keeps one table per language (the `None` key covers every language) with
+    the pks sorted ascending, so a draw does not have to touch the database
+    until the chosen row is fetched. Tables are built lazily and dropped or
+    patched whenever a word of that language changes. Each table remembers
+    the data version it was built at and is rebuilt once the version moves
+    on, which is how writes made by other workers reach it.
+
+    `settings.WORDS_SAMPLING_MODE` picks the weights:
+    - "stored": the persisted `Word.p`, drawn in O(1) from an alias table.
+    - "lazy": computed at draw time from strength and last_seen with one
+      `now` for the whole draw, so reviewing a word only patches its entry.
+    """
+
+    def __init__(self, seed=None):
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._generations = {}
+        self._rng = np.random.default_rng(seed)
+
+    def _load(self, language, mode):
+        query = models.Word.objects.order_by("pk")
+        if language:
+            query = query.filter(language=language)
+
+        if mode == "lazy":
+            rows = list(query.values_list("pk", "strength", "last_seen"))
+            return _LazyTable(
+                np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+                np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows)),
+                np.fromiter(
+                    (_timestamp(r[2]) for r in rows), dtype=np.float64, count=len(rows)
+                ),
+            )
+        if mode == "stored":
+            rows = list(query.values_list("pk", "p"))
+            return _StoredTable(
+                np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+                np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows)),
+            )
+        raise ValueError(
+            f"Invalid sampling mode '{mode}'. Must be one of ['stored', 'lazy']."
+        )
+
+    def loaded_table(self, language=None):
+        """The cached table for `language` if it is up to date, `None` otherwise."""
+        table = self._tables.get(language)
+        if (
+            table is not None
+            and table.mode == settings.WORDS_SAMPLING_MODE
+            and table.version == versions.get_version(language)
+        ):
+            return table
+        return None
+
+    def get_table(self, language=None):
+        """Return the cached table for `language`, building it if needed."""
+        table = self.loaded_table(language)
+        if table is not None:
+            return table
+
+        with self._lock:
+            generation = self._generations.get(language, 0)
+        # Read before the rows: a write committing in between only costs
+        # one more rebuild
+        version = versions.get_version(language)
+        table = self._load(language, settings.WORDS_SAMPLING_MODE)
+        table.version = version
+        with self._lock:
+            # Only keep the table if nothing changed while it was being built
+            if self._generations.get(language, 0) == generation:
+                self._tables[language] = table
+        return table
+
+    def draw(self, language=None, pk_range=None, table=None):
+        """
+        Draw the pk of a word weighted by its probability.
+        :param language: Restrict the draw to one language.
+        :param pk_range: Optional inclusive (low, high) range of pks.
+        :param table: Draw from this table of `language` (see `get_table`)
+            instead of looking it up, so the draw never touches the database.
+        :return: The pk of the chosen word.
+        """
+        if table is None:
+            table = self.get_table(language)
+        start, stop = 0, len(table.pks)
+        if pk_range is not None:
+            low, high = pk_range
+            start = int(np.searchsorted(table.pks, low, side="left"))
+            stop = int(np.searchsorted(table.pks, high, side="right"))
+        if start >= stop:
+            raise ValueError("No words found.")
+        return int(table.pks[table.draw(self._rng, start, stop)])
+
+    def sample(self, language=None, k=1):
+        """
+        Draw the pks of `k` distinct words without replacement, weighted by
+        their probability (Efraimidis-Spirakis: keep the k largest u^(1/w)).
+        Words with no weight only fill up whatever is left.
+        :return: List of at most `k` pks, likeliest first.
+        """
+        table = self.get_table(language)
+        n = len(table.pks)
+        if not n:
+            raise ValueError("No words found.")
+        k = min(k, n)
+
+        weights = np.clip(np.nan_to_num(table.weights(0, n)), 0.0, None)
+        positive = np.flatnonzero(weights > 0)
+        keys = np.log(self._rng.random(len(positive))) / weights[positive]
+        if len(positive) > k:
+            top = np.argpartition(-keys, k - 1)[:k]
+            chosen = positive[top[np.argsort(-keys[top])]]
+        else:
+            chosen = positive[np.argsort(-keys)]
+            zero = np.flatnonzero(weights <= 0)
+            filler = self._rng.choice(zero, size=k - len(chosen), replace=False)
+            chosen = np.concatenate([chosen, filler])
+        return table.pks[chosen].tolist()
+
+    def invalidate(self, languages=None):
+        """
+        Drop the cached tables for the given languages (all of them if `None`).
+        The table spanning every language is always dropped as well.
+        """
+        with self._lock:
+            if languages is None:
+                keys = set(self._tables) | set(self._generations)
+            else:
+                if isinstance(languages, str):
+                    languages = [languages]
+                keys = set(languages) | {None}
+            for key in keys:
+                self._tables.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def expect_bump(self, languages=None):
+        """
+        Account for a write to `languages` (all of them if `None`) that the
+        cached tables already reflect, patched in place or not touching the
+        sampling data, so the version bump it causes on commit keeps them
+        current. A write that rolls back never bumps, and the tables it
+        patched get rebuilt.
+        """
+        with self._lock:
+            if languages is None:
+                keys = set(self._tables)
+            else:
+                if isinstance(languages, str):
+                    languages = [languages]
+                keys = set(languages) | {None}
+            for key in keys:
+                table = self._tables.get(key)
+                if table is not None:
+                    table.version += 1
+
+    def patch(self, word: models.Word, created=False):
+        """
+        Update the cached tables after `word` was saved. Tables that cannot be
+        patched in place (new words, moved languages, a changed p in "stored"
+        mode) are dropped instead.
+        """
+        if not created:
+            with self._lock:
+                patched = all(
+                    table.patch(word)
+                    for table in (
+                        self._tables.get(key) for key in (word.language, None)
+                    )
+                    if table is not None
+                )
+            if patched:
+                return
+        self.invalidate(word.language)
+
+
+word_sampler = WordSampler()
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+import words.models as models
+
+# Lowest ease SM-2 lets a word drop to
+MIN_EASE = 1.3
+
+
+def quality_from_correct(correct: bool):
+    """Map a plain right/wrong answer onto the SM-2 0..5 quality scale."""
+    return 4 if correct else 1
+
+
+def next_interval(interval: int, ease: float, quality: int):
+    """
+    SM-2 step.
+    :param interval: Current interval in days (0 for words never reviewed).
+    :param ease: Current ease factor.
+    :param quality: Answer quality from 0 (blackout) to 5 (perfect).
+    :return: (interval, ease) after the review.
+    """
+    if not 0 <= quality <= 5:
+        raise ValueError(f"Invalid quality '{quality}'. Must be between 0 and 5.")
+
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if quality < 3:
+        # Lapse, start the word over
+        return 1, ease
+    if interval <= 0:
+        return 1, ease
+    if interval == 1:
+        return 6, ease
+    return round(interval * ease), ease
+
+
+def schedule(word: models.Word, quality: int, now=None):
+    """Update the SM-2 fields of `word` for a review. Does not save the word."""
+    now = now or timezone.now()
+    word.interval, word.ease = next_interval(word.interval, word.ease, quality)
+    word.due_at = now + timedelta(days=word.interval)
+    return word
@@ -13,8 +13,14 @@ class WordSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
     def get_synonyms(self, obj):
-        # Return a list of synonym words (as strings)
-        return [syn.word for syn in obj.get_synonyms()]
+        # Return a list of synonym words (as strings). Async views pass them
+        # in the "synonyms" context ({pk: [word, ...]}), otherwise `.all()`
+        # reads the prefetched synonyms (see database_functions.with_synonyms)
+        # instead of running a query per word.
+        synonyms = self.context.get("synonyms")
+        if synonyms is not None:
+            return synonyms.get(obj.pk, [])
+        return [syn.word for syn in obj.synonyms.all()]
 
 
 class LanguagesSerializer(serializers.Serializer):
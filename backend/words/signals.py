@@ -0,0 +1,109 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+import words.models as models
+from words import versions
+from words.fuzzy import fuzzy_index
+from words.sampler import word_sampler
+
+
+def _invalidate(languages):
+    word_sampler.invalidate(languages)
+    fuzzy_index.invalidate(languages)
+
+
+def words_changed(languages=None):
+    """
+    Drop the in-process caches for the given languages (all of them if `None`)
+    and bump their data version.
+    Call this after bulk writes (`bulk_create`, `bulk_update`, `update`) since
+    those do not send the model signals below. Inside a transaction both wait
+    for the commit: a cache rebuilt from the old rows before then is dropped.
+    """
+    transaction.on_commit(lambda: _invalidate(languages))
+    versions.bump(languages)
+
+
+def words_reviewed(words):
+    """
+    Patch the in-process caches with the new strength and last_seen of
+    `words`, written with a bulk write, and bump their data version. Cheaper
+    than `words_changed` when nothing else changed, but only valid in the
+    "lazy" sampling mode (in "stored" mode their `p` changed as well).
+    """
+    for word in words:
+        word_sampler.patch(word)
+    _bump({word.language for word in words})
+
+
+def _bump(languages=None):
+    # The in-process caches already reflect the write (the receivers below
+    # patch them), its version bump must not make them look stale
+    word_sampler.expect_bump(languages)
+    fuzzy_index.expect_bump(languages)
+    versions.bump(languages)
+
+
+def _synonym_languages(word):
+    """Languages whose serialized words list `word` as a synonym."""
+    return set(word.synonyms.order_by().values_list("language", flat=True).distinct())
+
+
+@receiver(post_save, sender=models.Word)
+def word_saved(sender, instance, created, **kwargs):
+    word_sampler.patch(instance, created=created)
+
+    stored = (
+        getattr(instance, "_stored_word", None),
+        getattr(instance, "_stored_language", None),
+    )
+    languages = {instance.language}
+    if created:
+        fuzzy_index.add(instance.word, instance.language)
+    elif stored != (instance.word, instance.language):
+        if stored[0] is not None:
+            fuzzy_index.discard(*stored)
+        fuzzy_index.add(instance.word, instance.language)
+        # A rename shows up in the synonym lists of other languages
+        languages |= _synonym_languages(instance)
+    instance._stored_word = instance.word
+    instance._stored_language = instance.language
+    _bump(languages)
+
+
+@receiver(pre_delete, sender=models.Word)
+def word_deleting(sender, instance, **kwargs):
+    # The synonym links are gone by the time post_delete is sent. Bulk
+    # deletes (see database_functions.remove_words) look them up beforehand.
+    if not hasattr(instance, "_synonym_languages"):
+        instance._synonym_languages = _synonym_languages(instance)
+
+
+@receiver(post_delete, sender=models.Word)
+def word_deleted(sender, instance, **kwargs):
+    # The fuzzy index only loses one word, keep the rest of it
+    fuzzy_index.discard(instance.word, instance.language)
+    languages = {instance.language} | getattr(instance, "_synonym_languages", set())
+    word_sampler.invalidate(languages)
+    _bump(languages)
+
+
+@receiver(m2m_changed, sender=models.Word.synonyms.through)
+def synonyms_changed(sender, instance, action, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if action == "post_clear":
+        # The cleared words are unknown by now
+        _bump()
+        return
+
+    languages = {instance.language}
+    if pk_set:
+        languages |= set(
+            models.Word.objects.filter(pk__in=pk_set)
+            .order_by()
+            .values_list("language", flat=True)
+            .distinct()
+        )
+    _bump(languages)
@@ -1,4 +1,10 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from words.database_functions import (
     update_or_create_word,
@@ -7,8 +13,23 @@ from words.database_functions import (
     set_probability,
     get_weighted_word,
     update_word_synonyms,
+    recompute_probabilities,
+    review_word,
+    get_weighted_words,
+    get_due_words,
+    apply_review_results,
+    get_translation_pairs,
+    complete_words,
+    get_word,
+    WordNotFound,
 )
+from words.fuzzy import edit_distance, fuzzy_index
 import words.models as models
+import numpy as np
+from words.sampler import AliasTable, word_sampler
+from words.signals import words_changed
+from words import scheduler, versions
+from thyme_server.sqlite import pragma_statements
 
 
 class DatabaseFunctionsTestCase(TestCase):
@@ -59,6 +80,30 @@ class DatabaseFunctionsTestCase(TestCase):
         self.word.refresh_from_db()
         self.assertIsNotNone(self.word.p)
 
+    def test_recompute_probabilities_matches_set_probability(self):
+        now = timezone.now()
+        self.word.last_seen = now - timezone.timedelta(minutes=5)
+        self.word.save()
+        for i, strength in enumerate([0, 1, 4]):
+            models.Word.objects.create(
+                word=f"w{i}",
+                language=self.language,
+                strength=strength,
+                last_seen=now - timezone.timedelta(seconds=30 * (i + 1)),
+            )
+        models.Word.objects.create(word="otro", language="es", strength=2)
+
+        with self.assertNumQueries(4):
+            self.assertEqual(recompute_probabilities(self.language), 4)
+        recomputed = dict(
+            models.Word.objects.filter(language=self.language).values_list("word", "p")
+        )
+        self.assertEqual(models.Word.objects.get(word="otro").p, 0.0)
+
+        for word in models.Word.objects.filter(language=self.language):
+            set_probability(word)
+            self.assertAlmostEqual(recomputed[word.word], word.p, delta=word.p * 1e-3)
+
     def test_get_random_word(self):
         word = get_weighted_word(language=self.language)
         self.assertIsInstance(word, models.Word)
@@ -102,3 +147,494 @@ class DatabaseFunctionsTestCase(TestCase):
         for s in synonyms:
             syn_obj = models.Word.objects.get(word=s, language=synonym_language)
             self.assertIn(main_word, syn_obj.synonyms.values_list("word", flat=True))
+
+    def test_update_word_synonyms_replaces_one_language(self):
+        word, _ = update_or_create_word("dog", "en")
+        update_word_synonyms("dog", "en", ["hound"], "en")
+        update_word_synonyms("dog", "en", ["perro", "can"], "es")
+        can = models.Word.objects.get(word="can", language="es")
+        can.strength = 4
+        can.save()
+
+        _, synonyms = update_word_synonyms("dog", "en", ["can", "chucho", "can"], "es")
+        self.assertEqual([s.word for s in synonyms], ["can", "chucho"])
+        self.assertEqual(
+            set(word.synonyms.values_list("word", flat=True)), {"hound", "can", "chucho"}
+        )
+        # The dropped synonym is unlinked both ways but kept as a word
+        perro = models.Word.objects.get(word="perro", language="es")
+        self.assertFalse(perro.synonyms.exists())
+        # Existing synonyms keep their strength
+        self.assertEqual(models.Word.objects.get(pk=can.pk).strength, 4)
+
+    def test_update_word_synonyms_constant_queries(self):
+        update_or_create_word("dog", "en")
+        update_word_synonyms("dog", "en", ["a"], "es")
+        with self.assertNumQueries(8):
+            update_word_synonyms("dog", "en", ["b"], "es")
+        with self.assertNumQueries(8):
+            update_word_synonyms("dog", "en", [f"s{i}" for i in range(50)], "es")
+
+
+class WordSamplerTestCase(TestCase):
+    def setUp(self):
+        word_sampler.invalidate()
+        self.heavy = models.Word.objects.create(word="heavy", language="en", p=9.0)
+        self.light = models.Word.objects.create(word="light", language="en", p=1.0)
+        self.other = models.Word.objects.create(word="otro", language="es", p=1.0)
+
+    def test_alias_table_distribution(self):
+        rng = np.random.default_rng(0)
+        table = AliasTable([1.0, 0.0, 3.0])
+        counts = np.bincount([table.draw(rng) for _ in range(4000)], minlength=3)
+        self.assertEqual(counts[1], 0)
+        self.assertAlmostEqual(counts[2] / counts.sum(), 0.75, delta=0.03)
+
+    def test_alias_table_all_zero_is_uniform(self):
+        rng = np.random.default_rng(0)
+        table = AliasTable([0.0, 0.0])
+        self.assertEqual({table.draw(rng) for _ in range(100)}, {0, 1})
+
+    def test_draw_is_weighted_and_filtered_by_language(self):
+        draws = [get_weighted_word(language="en").word for _ in range(500)]
+        self.assertNotIn("otro", draws)
+        self.assertGreater(draws.count("heavy"), draws.count("light"))
+
+    def test_draw_only_fetches_chosen_row(self):
+        get_weighted_word(language="en")
+        with self.assertNumQueries(1):
+            get_weighted_word(language="en")
+
+    def test_table_is_rebuilt_on_save_and_delete(self):
+        get_weighted_word(language="en")
+        self.heavy.p = 0.0
+        self.heavy.save()
+        self.light.delete()
+        self.assertEqual(get_weighted_word(language="en"), self.heavy)
+
+    def test_writes_of_other_workers_rebuild(self):
+        get_weighted_word(language="en")
+        with self.captureOnCommitCallbacks(execute=True):
+            # Neither the signals nor words_changed run in this worker
+            models.Word.objects.filter(pk=self.heavy.pk).update(p=0.0)
+            versions.bump(["en"])
+        draws = {get_weighted_word(language="en").word for _ in range(50)}
+        self.assertEqual(draws, {"light"})
+
+    def test_bulk_write_drops_tables_built_before_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            models.Word.objects.filter(pk=self.heavy.pk).update(p=0.0)
+            words_changed(["en"])
+            # Another thread may build the table before the write commits
+            word_sampler.get_table("en")
+            self.assertIsNotNone(word_sampler.loaded_table("en"))
+        self.assertIsNone(word_sampler.loaded_table("en"))
+
+    def test_sample_without_replacement(self):
+        words = get_weighted_words(language="en", n=5)
+        self.assertEqual(sorted(w.word for w in words), ["heavy", "light"])
+
+    def test_sample_prefers_heavy_words(self):
+        firsts = [get_weighted_words(language="en", n=1)[0].word for _ in range(300)]
+        self.assertGreater(firsts.count("heavy"), firsts.count("light"))
+
+    def test_pk_range(self):
+        pk = self.light.pk
+        self.assertEqual(get_weighted_word(language="en", pk_range=(pk, pk)), self.light)
+
+
+@override_settings(WORDS_SAMPLING_MODE="lazy", WORDS_RECENCY="saturating")
+class LazySamplingTestCase(TestCase):
+    def setUp(self):
+        word_sampler.invalidate()
+        long_ago = timezone.now() - timezone.timedelta(days=30)
+        self.weak = models.Word.objects.create(
+            word="weak", language="en", strength=0, last_seen=long_ago
+        )
+        self.strong = models.Word.objects.create(
+            word="strong", language="en", strength=5, last_seen=long_ago
+        )
+
+    def test_draw_prefers_weak_words_regardless_of_p(self):
+        draws = [get_weighted_word(language="en").word for _ in range(200)]
+        self.assertGreater(draws.count("weak"), draws.count("strong"))
+
+    def test_review_only_writes_reviewed_row_and_patches_table(self):
+        table = word_sampler.get_table("en")
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                review_word(self.weak, correct=True)
+        self.assertIs(word_sampler.loaded_table("en"), table)
+        self.assertEqual(table.strength[table.index_of(self.weak.pk)], 1)
+
+        # The table is patched in place, a draw still only fetches one row
+        with self.assertNumQueries(1):
+            get_weighted_word(language="en")
+
+    def test_review_batch_patches_table(self):
+        table = word_sampler.get_table("en")
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_review_results(
+                [
+                    {"word": "weak", "language": "en", "correct": True, "seen_at": now},
+                    {"word": "strong", "language": "en", "correct": True},
+                ]
+            )
+        self.assertIs(word_sampler.loaded_table("en"), table)
+        i = table.index_of(self.weak.pk)
+        self.assertEqual((table.strength[i], table.last_seen[i]), (1, now.timestamp()))
+        self.assertEqual(table.strength[table.index_of(self.strong.pk)], 5)
+        with self.assertNumQueries(1):
+            get_weighted_word(language="en")
+
+    def test_just_seen_words_are_not_drawn(self):
+        models.Word.objects.create(
+            word="forgotten",
+            language="en",
+            last_seen=timezone.now() - timezone.timedelta(days=30),
+        )
+        review_word(self.weak, correct=False, seen_at=timezone.now())
+        draws = {get_weighted_word(language="en").word for _ in range(50)}
+        self.assertEqual(draws, {"forgotten"})
+
+
+class SchedulerTestCase(TestCase):
+    def test_next_interval(self):
+        self.assertEqual(scheduler.next_interval(0, 2.5, 4), (1, 2.5))
+        self.assertEqual(scheduler.next_interval(1, 2.5, 4), (6, 2.5))
+        self.assertEqual(scheduler.next_interval(6, 2.5, 5)[0], 16)
+        interval, ease = scheduler.next_interval(30, 1.3, 0)
+        self.assertEqual((interval, ease), (1, scheduler.MIN_EASE))
+        with self.assertRaises(ValueError):
+            scheduler.next_interval(1, 2.5, 6)
+
+    def test_review_schedules_word(self):
+        word = models.Word.objects.create(word="apple", language="en")
+        now = timezone.now()
+        review_word(word, correct=True, seen_at=now)
+        review_word(word, correct=True, seen_at=now)
+        word.refresh_from_db()
+        self.assertEqual(word.interval, 6)
+        self.assertEqual(word.due_at, now + timezone.timedelta(days=6))
+
+    def test_get_due_words(self):
+        now = timezone.now()
+        for i in range(5):
+            models.Word.objects.create(
+                word=f"w{i}", language="en", due_at=now - timezone.timedelta(days=i)
+            )
+        models.Word.objects.create(
+            word="later", language="en", due_at=now + timezone.timedelta(days=1)
+        )
+        models.Word.objects.create(word="otro", language="es")
+
+        with self.assertNumQueries(2):
+            due = get_due_words("en", n=3, now=now)
+        self.assertEqual([w.word for w in due], ["w4", "w3", "w2"])
+        self.assertNotIn("later", [w.word for w in get_due_words("en", 10, now)])
+
+    def test_due_query_uses_index(self):
+        plan = (
+            models.Word.objects.filter(language="en", due_at__lte=timezone.now())
+            .order_by("due_at", "pk")[:10]
+            .explain()
+        )
+        self.assertIn("word_language_due_at_idx", plan)
+
+
+class ReviewResultsTestCase(TestCase):
+    def setUp(self):
+        self.known = models.Word.objects.create(word="known", language="en", strength=5)
+        self.new = models.Word.objects.create(word="new", language="en", strength=0)
+
+    def test_strength_is_clamped(self):
+        now = timezone.now()
+        updated, missing = apply_review_results(
+            [
+                {"word": "known", "language": "en", "correct": True, "seen_at": now},
+                {"word": "known", "language": "en", "correct": False},
+                {"word": "new", "language": "en", "correct": False},
+                {"word": "nope", "language": "en", "correct": True},
+            ]
+        )
+        self.assertEqual((updated, missing), (2, [("nope", "en")]))
+        self.known.refresh_from_db()
+        self.new.refresh_from_db()
+        self.assertEqual(self.known.strength, 4)
+        self.assertEqual(self.new.strength, 0)
+        self.assertGreaterEqual(self.known.last_seen, now)
+        self.assertEqual(self.new.interval, 1)
+
+    def test_one_scheduling_step_per_batch(self):
+        now = timezone.now()
+        earlier = now - timezone.timedelta(hours=1)
+        apply_review_results(
+            [{"word": "new", "language": "en", "correct": True, "seen_at": now}] * 7
+            # Sent last but seen first
+            + [{"word": "new", "language": "en", "correct": False, "seen_at": earlier}]
+        )
+        self.new.refresh_from_db()
+        # The latest result is a single correct answer
+        self.assertEqual(self.new.interval, 1)
+        self.assertEqual(self.new.due_at, now + timezone.timedelta(days=1))
+        self.assertEqual(self.new.last_seen, now)
+        self.assertEqual(self.new.strength, 5)
+
+    def test_strength_uses_current_value(self):
+        results = [{"word": "new", "language": "en", "correct": True}]
+        # Someone else reviewed the word after it was loaded
+        models.Word.objects.filter(pk=self.new.pk).update(strength=3)
+        apply_review_results(results)
+        self.new.refresh_from_db()
+        self.assertEqual(self.new.strength, 4)
+
+    @override_settings(WORDS_SAMPLING_MODE="lazy")
+    def test_query_count_does_not_depend_on_batch_size(self):
+        results = [
+            {"word": w, "language": "en", "correct": True}
+            for w in ("known", "new") * 15
+        ]
+        # select, savepoint, bulk update, release
+        with self.assertNumQueries(4):
+            apply_review_results(results)
+
+    def test_invalid_seen_at(self):
+        with self.assertRaises(ValueError):
+            apply_review_results(
+                [{"word": "new", "language": "en", "correct": True, "seen_at": "x"}]
+            )
+
+    def test_correct_must_be_a_boolean(self):
+        with self.assertRaises(ValueError):
+            apply_review_results([{"word": "new", "language": "en", "correct": "false"}])
+        with self.assertRaises(ValueError):
+            apply_review_results([{"word": "new", "language": "en"}])
+
+
+class UploadCsvTestCase(TestCase):
+    def write_csv(self, lines):
+        f = tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False, encoding="utf-8"
+        )
+        f.write("word;translation;last_seen;strength\n")
+        f.write("\n".join(lines) + "\n")
+        f.close()
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def test_upload_csv(self):
+        models.Word.objects.create(word="perro", language="es", strength=3)
+        path = self.write_csv(
+            [
+                "dog;perro, can;2024-01-01T00:00:00;2",
+                "cat;gato;2024-01-02T00:00:00+00:00;1",
+                "bad;malo;not a date;1",
+                "house;;2024-01-03T00:00:00;0",
+            ]
+        )
+        out = StringIO()
+        call_command("upload_csv", path, "en", "es", "--chunk-size", "2", stdout=out)
+
+        self.assertIn("Error processing word 'bad'", out.getvalue())
+        self.assertFalse(models.Word.objects.filter(word="bad").exists())
+        dog = models.Word.objects.get(word="dog", language="en")
+        self.assertEqual(dog.strength, 2)
+        self.assertEqual(
+            set(dog.synonyms.values_list("word", flat=True)), {"perro", "can"}
+        )
+        # Links are symmetrical and existing translations keep their strength
+        perro = models.Word.objects.get(word="perro", language="es")
+        self.assertEqual(list(perro.synonyms.values_list("word", flat=True)), ["dog"])
+        self.assertEqual(perro.strength, 3)
+        self.assertTrue(models.Word.objects.filter(word="house").exists())
+
+        # Importing again updates in place
+        call_command("upload_csv", path, "en", "es", stdout=StringIO())
+        self.assertEqual(models.Word.objects.count(), 6)
+        self.assertEqual(dog.synonyms.count(), 2)
+
+
+class ExportWordsTestCase(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.dog = models.Word.objects.create(
+            word="dog", language="en", strength=2, last_seen=now
+        )
+        models.Word.objects.create(word="lonely", language="en", strength=1)
+        update_word_synonyms("dog", "en", ["perro", "can"], "es")
+        update_word_synonyms("dog", "en", ["chien"], "fr")
+
+    def test_export_round_trips_through_upload_csv(self):
+        out = StringIO()
+        with self.assertNumQueries(1):
+            call_command("export_words", "en", "es", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "word;translation;last_seen;strength")
+        self.assertTrue(lines[1].startswith("dog;can, perro;"))
+        self.assertTrue(lines[2].startswith("lonely;;"))
+
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".csv", delete=False, encoding="utf-8"
+        ) as f:
+            f.write(out.getvalue())
+        self.addCleanup(os.remove, f.name)
+        models.Word.objects.all().delete()
+
+        call_command("upload_csv", f.name, "en", "es", stdout=StringIO())
+        dog = models.Word.objects.get(word="dog", language="en")
+        self.assertEqual((dog.strength, dog.last_seen), (2, self.dog.last_seen))
+        self.assertEqual(
+            set(dog.synonyms.values_list("word", flat=True)), {"perro", "can"}
+        )
+
+    def test_csv_export_needs_translation_language(self):
+        with self.assertRaises(CommandError):
+            call_command("export_words", "en", stdout=StringIO())
+
+    def test_export_jsonl_without_translation_language(self):
+        out = StringIO()
+        call_command("export_words", "en", "--format", "jsonl", stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(rows[0]["translations"], ["can", "chien", "perro"])
+        self.assertEqual(rows[1]["translations"], [])
+
+
+class TranslationPairsTestCase(TestCase):
+    def setUp(self):
+        update_or_create_word("dog", "en")
+        update_or_create_word("cat", "en")
+        update_or_create_word("bird", "en")
+        update_word_synonyms("dog", "en", ["perro", "can"], "es")
+        update_word_synonyms("cat", "en", ["gato"], "es")
+        update_word_synonyms("cat", "en", ["chat"], "fr")
+
+    def test_walk_all_pairs(self):
+        pairs, after = [], None
+        while True:
+            with self.assertNumQueries(1):
+                page, after = get_translation_pairs("en", "es", after=after, limit=2)
+            pairs += page
+            if after is None:
+                break
+        self.assertEqual(pairs, [("cat", "gato"), ("dog", "can"), ("dog", "perro")])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            get_translation_pairs("en", "es", after="garbage")
+
+    def test_list_synonyms_command(self):
+        from words.words import list_synonyms
+
+        self.assertEqual(
+            [*list_synonyms("es", "en", 2)], ["can -> dog", "gato -> cat"]
+        )
+
+
+class CompleteWordsTestCase(TestCase):
+    def setUp(self):
+        for word, language in [
+            ("pre", "en"),
+            ("prefix", "en"),
+            ("prefix", "es"),
+            ("press", "en"),
+            ("pr\U0001f600", "en"),
+            ("pro", "en"),
+            ("apre", "en"),
+        ]:
+            models.Word.objects.create(word=word, language=language)
+
+    def test_prefix(self):
+        self.assertEqual(
+            complete_words("pre", "en"), ["pre", "prefix", "press"]
+        )
+
+    def test_distinct_across_languages(self):
+        self.assertEqual(complete_words("pref"), ["prefix"])
+
+    def test_k_and_non_bmp(self):
+        self.assertEqual(complete_words("pr", "en", k=2), ["pre", "prefix"])
+        self.assertIn("pr\U0001f600", complete_words("pr", "en", k=10))
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            complete_words("p", "en")
+
+    def test_invalid_language(self):
+        with self.assertRaises(ValueError):
+            complete_words("p", "xx")
+
+
+class FuzzyIndexTestCase(TestCase):
+    def setUp(self):
+        fuzzy_index.invalidate()
+        for word, language in [
+            ("house", "en"),
+            ("horse", "en"),
+            ("mouse", "en"),
+            ("Hose", "en"),
+            ("elephant", "en"),
+            ("house", "es"),
+        ]:
+            models.Word.objects.create(word=word, language=language)
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance("kitten", "sitting", 5), 3)
+        self.assertEqual(edit_distance("kitten", "sitting", 2), 3)
+        self.assertEqual(edit_distance("a", "abcd", 1), 2)
+
+    def test_suggest(self):
+        self.assertEqual(
+            fuzzy_index.suggest("hous", "en"), ["house", "Hose", "horse", "mouse"]
+        )
+        self.assertEqual(fuzzy_index.suggest("elefant", "en", max_distance=1), [])
+        self.assertEqual(fuzzy_index.suggest("elefant", "en"), ["elephant"])
+        self.assertEqual(fuzzy_index.suggest("HOUSE", limit=1), ["house"])
+
+    def test_updated_incrementally(self):
+        fuzzy_index.suggest("x", "en")
+        with self.captureOnCommitCallbacks(execute=True):
+            word = models.Word.objects.create(word="elephants", language="en")
+            models.Word.objects.get(word="horse").delete()
+            word = models.Word.objects.get(pk=word.pk)
+            word.word = "elegant"
+            word.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(fuzzy_index.suggest("elegent", "en"), ["elegant"])
+            self.assertNotIn("horse", fuzzy_index.suggest("horse", "en"))
+
+    def test_writes_of_other_workers_rebuild(self):
+        fuzzy_index.suggest("x", "en")
+        with self.captureOnCommitCallbacks(execute=True):
+            # Neither the signals nor words_changed run in this worker
+            models.Word.objects.filter(word="horse").update(word="hearse")
+            versions.bump(["en"])
+        self.assertEqual(fuzzy_index.suggest("hearse", "en", limit=1), ["hearse"])
+
+    def test_bulk_changes_rebuild(self):
+        fuzzy_index.suggest("x", "en")
+        update_word_synonyms("house", "en", ["casa"], "es")
+        self.assertEqual(fuzzy_index.suggest("caza", "es"), ["casa"])
+
+    def test_get_word_suggestions(self):
+        with self.assertRaises(WordNotFound) as raised:
+            get_word("hosue", "en")
+        self.assertIn("house", raised.exception.suggestions)
+        self.assertIn("Did you mean: ", str(raised.exception))
+
+
+class SqliteProfileTestCase(TestCase):
+    def test_pragmas_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_pragma_statements(self):
+        self.assertEqual(
+            pragma_statements({"synchronous": "normal", "cache_size": "-2000", "mmap_size": ""}),
+            ["PRAGMA synchronous = normal", "PRAGMA cache_size = -2000"],
+        )
+        with self.assertRaises(ValueError):
+            pragma_statements({"synchronous": "off; DROP TABLE words_word"})
+        with self.assertRaises(ValueError):
+            pragma_statements({"foreign_keys": "off"})
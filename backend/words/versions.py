@@ -0,0 +1,64 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+import words.models as models
+
+# Version key covering every language, bumped along with each language
+ALL_LANGUAGES = "*"
+
+
+def _version_key(language):
+    return f"words:version:{language or ALL_LANGUAGES}"
+
+
+def get_version(language=None):
+    """
+    Current data version of a language (or of every language).
+    Versions live in Django's cache, so they are shared between workers as
+    long as the cache backend is. A cold cache starts from the current time
+    in milliseconds, which keeps versions from repeating across restarts.
+    """
+    key = _version_key(language)
+    version = cache.get(key)
+    if version is not None:
+        return version
+
+    cache.add(key, int(time.time() * 1000), timeout=None)
+    return cache.get(key, int(time.time() * 1000))
+
+
+def get_versions(languages):
+    """`get_version` of several languages, in one cache round trip when warm."""
+    keys = {_version_key(language): language for language in languages}
+    found = cache.get_many(keys)
+    return {
+        language: found[key] if key in found else get_version(language)
+        for key, language in keys.items()
+    }
+
+
+def _bump(languages):
+    for language in {*languages, ALL_LANGUAGES}:
+        get_version(language)
+        try:
+            cache.incr(_version_key(language))
+        except ValueError:
+            # Evicted between the two calls, the next read starts it over
+            pass
+
+
+def bump(languages=None):
+    """
+    Mark the data of the given languages (all of them if `None`) as changed.
+    The version covering every language is always bumped as well.
+    Inside a transaction the bump waits for the commit, so that no reader
+    can pair the new version with rows that are not visible yet.
+    """
+    if languages is None:
+        languages = models.Languages.values
+    elif isinstance(languages, str):
+        languages = [languages]
+    languages = set(languages)
+    transaction.on_commit(lambda: _bump(languages))
@@ -4,7 +4,13 @@ from words.database_functions import (
     update_or_create_word,
     assert_valid_language,
     remove_word,
+    get_due_words,
+    get_translation_pairs,
+    iter_words_by_name,
+    WordNotFound,
 )
+from words.fuzzy import fuzzy_index
+from terminal.pager import PAGE_SIZE
 
 
 words_terminal = Terminal(prompt="words> ")
@@ -23,11 +29,16 @@ def remove(word: str, language: str = None):
         try:
             remove_word(word, language)
         except Exception as e:
-            return e
+            return str(e)
     else:
         word_objs = Word.objects.filter(word=word)
         if not word_objs.exists():
-            return f"Word '{word}' not found in the database."
+            return str(
+                WordNotFound(
+                    f"Word '{word}' not found in the database.",
+                    fuzzy_index.suggest(word),
+                )
+            )
         if word_objs.count() > 1:
             return (
                 f"Multiple entries found for word '{word}'. Please specify a language."
@@ -42,40 +53,56 @@ def list(language: str = None):
     if language:
         assert_valid_language(language)
 
-    words = Word.objects.all()
-    if language:
-        words = words.filter(language=language)
-
-    words = words.order_by("word", "language", "strength")
-
-    if not words.exists():
-        return f"No words found for language '{language}'."
+    def lines():
+        empty = True
+        for word in iter_words_by_name(language):
+            empty = False
+            yield f"{word.word} ({word.language}, {word.strength})"
+        if empty:
+            yield f"No words found for language '{language}'."
 
-    return "\n".join(
-        f"{word.word} ({word.language}, {word.strength})" for word in words
-    )
+    # Served page by page by the input context handler
+    return lines()
 
 
 def list_synonyms(language: str, translation_language: str, max: int = 10):
     """List all synonyms for words in a specific language, showing their synonyms in another language."""
-    assert_valid_language(language)
-    assert_valid_language(translation_language)
-
-    words = Word.objects.filter(language=language)
-    results = []
-    for word in words:
-        synonyms = word.synonyms.filter(language=translation_language)
-        for synonym in synonyms:
-            results.append(f"{word.word} -> {synonym.word}")
-            if len(results) >= max:
-                break
-        if len(results) >= max:
-            break
-
-    if not results:
+    pairs, after = get_translation_pairs(
+        language, translation_language, limit=min(max, PAGE_SIZE)
+    )
+
+    if not pairs:
         return f"No synonyms found for language '{language}' and translation language '{translation_language}'."
 
-    return "\n".join(results)
+    def lines(pairs, after):
+        count = 0
+        while True:
+            for word, synonym in pairs[: max - count]:
+                yield f"{word} -> {synonym}"
+            count += len(pairs)
+            if after is None or count >= max:
+                return
+            pairs, after = get_translation_pairs(
+                language,
+                translation_language,
+                after=after,
+                limit=min(max - count, PAGE_SIZE),
+            )
+
+    # Served page by page by the input context handler
+    return lines(pairs, after)
+
+
+def due(language: str, n: int = 10):
+    """List the next words that are due for review in a language."""
+    words = get_due_words(language, n)
+    if not words:
+        return f"No words due for language '{language}'."
+
+    return "\n".join(
+        f"{word.word} ({word.language}, due {word.due_at:%Y-%m-%d %H:%M})"
+        for word in words
+    )
 
 
 def update(word: str, new_word: str, language: str = "en"):
@@ -86,7 +113,12 @@ def update(word: str, new_word: str, language: str = "en"):
         word_obj.save()
         return f"Word '{word}' updated to '{new_word}' in language '{language}'."
     except Word.DoesNotExist:
-        return f"Word '{word}' not found in language '{language}'."
+        return str(
+            WordNotFound(
+                f"Word '{word}' not found in language '{language}'.",
+                fuzzy_index.suggest(word, language),
+            )
+        )
     except Exception as e:
         return f"Error updating word: {e}"
 
@@ -124,10 +156,33 @@ words_commands = [
             ),
         ],
     ),
+    Command(
+        update,
+        description="Rename a word in the database.",
+        params=[
+            Parameter("word", str, "The word to rename.", positional=True),
+            Parameter("new_word", str, "The new spelling.", positional=True),
+            Parameter(
+                "language",
+                str,
+                "The language of the word.",
+                required=False,
+                ailias="l",
+            ),
+        ],
+    ),
     Command(
         list,
         description="List all words in the database for a given language.",
     ),
+    Command(
+        due,
+        description="List the next words that are due for review.",
+        params=[
+            Parameter("language", str, "The language of the words.", positional=True),
+            Parameter("n", int, "How many words to list."),
+        ],
+    ),
 ]
 
 for command in words_commands: